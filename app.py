@@ -1,5 +1,15 @@
-from flask import Flask, render_template, jsonify, request, session
-from probability_puzzles import PokerQuiz
+import json
+import random
+from flask import Flask, Response, render_template, jsonify, request, session
+from probability_puzzles import PokerQuiz, STREET_NAMES, runout_probabilities
+from validator import HAND_TYPES, HandState, probabilityValidator
+from cards import card_strs, mask_to_ints
+from puzzle_pool import PuzzlePool, STAGE_CARDS
+from bulk_puzzles import bulk_pool, iter_puzzles
+from puzzle_store import PuzzleStore
+from compute_offload import ComputeOffload
+from flop_table import get_flop_table
+from metrics import Metrics
 # from flask_session import Session  # If you want to use server-side sessions
 
 app = Flask(__name__, template_folder='templates')
@@ -7,6 +17,121 @@ app.secret_key = 'REPLACE_WITH_RANDOM_KEY'  # needed for session
 # app.config['SESSION_TYPE'] = 'filesystem'  # example
 # Session(app)
 
+# Settings are read before the pools and stores below are built from them: a
+# config file named by POKER_PUZZLES_SETTINGS, then FLASK_-prefixed environment
+# variables (FLASK_PUZZLE_POOL_DEPTH=64, FLASK_COMPUTE_WORKERS=2, ...). The
+# setdefault calls only fill in what neither of them set.
+app.config.from_envvar('POKER_PUZZLES_SETTINGS', silent=True)
+app.config.from_prefixed_env()
+
+# Puzzles are pre-generated in the background so /new_hand only pops one
+app.config.setdefault('PUZZLE_POOL_DEPTH', 32)
+app.config.setdefault('PUZZLE_POOL_LOW_WATER', 8)
+app.config.setdefault('PUZZLE_POOL_WORKERS', 1)
+puzzle_pool = PuzzlePool(target_depth=app.config['PUZZLE_POOL_DEPTH'],
+                         low_water=app.config['PUZZLE_POOL_LOW_WATER'],
+                         workers=app.config['PUZZLE_POOL_WORKERS'])
+
+# Dealt puzzles live server-side; the session only holds their id
+app.config.setdefault('PUZZLE_TTL_SECONDS', 3600)
+puzzle_store = PuzzleStore(ttl=app.config['PUZZLE_TTL_SECONDS'])
+
+# Inline probability work goes to a process pool with a per-request time budget;
+# past the budget the request gets a quick estimate and the exact result follows
+app.config.setdefault('COMPUTE_BUDGET_SECONDS', 0.05)
+app.config.setdefault('COMPUTE_WORKERS', None)
+# Request latency per route and time per stage, scraped from /metrics
+metrics = Metrics()
+metrics.install(app)
+
+def count_flop_lookup(lookup):
+    """
+    Count one flop table lookup. Most of them run in pool worker processes,
+    so they report a 'hit'/'miss' flag back and are counted here instead.
+    """
+    if lookup is not None:
+        metrics.increment('poker_flop_table_lookups_total', help_text='Flop table lookups', result=lookup)
+
+compute = ComputeOffload(workers=app.config['COMPUTE_WORKERS'],
+                         budget=app.config['COMPUTE_BUDGET_SECONDS'],
+                         on_lookup=count_flop_lookup)
+
+def pool_metrics():
+    """Pool, offload, store and table counters, read when /metrics is scraped"""
+    pool = puzzle_pool.stats()
+    offload = compute.stats()
+    samples = [
+        ('poker_puzzle_pool_depth', 'gauge', 'Ready puzzles in the pool', {}, pool['depth']),
+        ('poker_puzzle_store_entries', 'gauge', 'Puzzles held server-side', {}, len(puzzle_store)),
+        ('poker_compute_cached', 'gauge', 'Exact results in the offload cache', {}, offload['cached']),
+    ]
+    for event in ('generated', 'served', 'misses', 'errors'):
+        samples.append(('poker_puzzle_pool_total', 'counter', 'Puzzle pool events',
+                        {'event': event}, pool[event]))
+    for event in ('cache_hits', 'submitted', 'within_budget', 'timeouts', 'late_completions', 'errors'):
+        samples.append(('poker_compute_total', 'counter', 'Compute offload events',
+                        {'event': event}, offload[event]))
+    return samples
+
+metrics.add_collector(pool_metrics)
+
+def preload_tables():
+    """
+    Load every lookup table once, in the process that forks the workers
+    (see gunicorn.conf.py), so workers share them instead of each loading
+    its own copy: the flop table is an mmap and shares the page cache, and
+    the rest is frozen out of the garbage collector's reach so it stays
+    copy-on-write. Pools and threads are left alone; they start lazily per
+    worker.
+    """
+    import gc
+    import preflop_table
+    from evaluator import load_tables
+    from puzzle_bank import get_puzzle_bank
+
+    load_tables()
+    get_flop_table()
+    preflop_table.load_table()
+    get_puzzle_bank()
+    gc.collect()
+    gc.freeze()
+
+# Largest n accepted by /api/puzzles, and the processes generating them (default: CPU count)
+app.config.setdefault('BULK_MAX_PUZZLES', 100000)
+app.config.setdefault('BULK_WORKERS', None)
+bulk_pool.workers = app.config['BULK_WORKERS']
+
+def deal_and_store():
+    """
+    Deal a puzzle (from the pool if it has one), store it and return (puzzle_id, puzzle).
+    An inline computation that misses its budget stores an approximate puzzle,
+    which is upgraded in place once the exact probabilities arrive.
+    """
+    puzzle = puzzle_pool.get()
+    if puzzle is not None:
+        count_flop_lookup(puzzle.pop('flop_lookup', None))
+        return puzzle_store.put(puzzle), puzzle
+
+    with metrics.stage('deal'):
+        hole_cards, community_cards = PokerQuiz().deal_new_hand()
+    puzzle = {'hole_cards': hole_cards, 'community_cards': community_cards}
+    puzzle_id = puzzle_store.put(puzzle)
+    # The exact result only belongs to this street; drop it if the turn was dealt meanwhile
+    street = len(community_cards)
+    with metrics.stage('probabilities'):
+        probabilities, approximate = compute.probabilities(
+            hole_cards, community_cards,
+            on_exact=lambda exact: puzzle_store.update(
+                puzzle_id, when=lambda stored: len(stored['community_cards']) == street,
+                probabilities=exact, approximate=False))
+    # A late exact result may already have landed while the estimate was computed
+    if approximate:
+        puzzle.setdefault('probabilities', probabilities)
+        puzzle.setdefault('approximate', True)
+    else:
+        puzzle.update(probabilities=probabilities, approximate=False)
+    return puzzle_id, puzzle
+
 @app.route('/')
 def home():
     return render_template('index.html')
@@ -16,20 +141,58 @@ def poker_probability_quiz():
     return render_template('poker_probability_quiz.html')
 
 ########################################################################
-# Deal a new hand and store the associated probabilities in session
+# Deal a new hand and store the associated probabilities server-side
 ########################################################################
+def bank_filters(args):
+    """
+    PuzzleBank.sample arguments from /new_hand's query string, or None
+    without any filter: ?category=flush&min=30&max=40 asks for a flush
+    probability in that band, and min_categories / max_categories bound how
+    many hand types are neither 0% nor 100%. Raises ValueError on bad values,
+    and on min / max without the category they bound.
+    """
+    if not any(name in args for name in ('category', 'min', 'max', 'min_categories', 'max_categories')):
+        return None
+    if ('min' in args or 'max' in args) and not args.get('category'):
+        raise ValueError("min and max need a category")
+    try:
+        return {
+            'category': args.get('category'),
+            'low': float(args.get('min', 0)),
+            'high': float(args.get('max', 100)),
+            'min_categories': int(args.get('min_categories', 0)),
+            'max_categories': int(args.get('max_categories', len(HAND_TYPES))),
+        }
+    except ValueError:
+        raise ValueError("bad filter value") from None
+
 @app.route('/new_hand', methods=['POST'])
 def new_hand():
-    pq = PokerQuiz()
-    hole_cards, community_cards = pq.deal_new_hand()
-    
-    # This calls your existing method, which uses the validator if community_cards is given.
-    probabilities = pq.calculate_probabilities(hole_cards, community_cards)
-
-    # Save everything in session
-    session['current_hole_cards'] = hole_cards
-    session['current_community_cards'] = community_cards
-    session['current_probabilities'] = probabilities
+    try:
+        filters = bank_filters(request.args)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    if filters is None:
+        # Take a ready puzzle from the pool; compute inline only if it has run dry.
+        # The puzzle is stored server-side and the session cookie only carries its id
+        session['puzzle_id'], puzzle = deal_and_store()
+    else:
+        # Filtered puzzles come from the prebuilt bank (see puzzle_bank.py)
+        from puzzle_bank import get_puzzle_bank
+        bank = get_puzzle_bank()
+        if bank is None:
+            return jsonify({"error": "no puzzle bank has been built"}), 503
+        try:
+            with metrics.stage('bank_sample'):
+                puzzle = bank.sample(**filters)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        if puzzle is None:
+            return jsonify({"error": "no puzzle matches these filters"}), 404
+        session['puzzle_id'] = puzzle_store.put(puzzle)
+    hole_cards = puzzle['hole_cards']
+    community_cards = puzzle['community_cards']
+    probabilities = puzzle['probabilities']
 
     # RESET the quiz scoreboard for each new hand deal
     session['quiz'] = { 
@@ -37,11 +200,115 @@ def new_hand():
         'total_questions': 0 
     }
 
-    return jsonify({
+    response = {
         'hole_cards': format_cards(hole_cards),
         'community_cards': format_cards(community_cards),
+        'street': STREET_NAMES[len(community_cards)],
+        'probabilities': probabilities,
+        'approximate': puzzle.get('approximate', False)
+    }
+    # ?outs=1 also lists the out cards and runner-runner combos for each hand
+    if request.args.get('outs') in ('1', 'true'):
+        response['outs'] = list_outs(hole_cards, community_cards)
+    return jsonify(response)
+
+@app.route('/next_street', methods=['POST'])
+def next_street():
+    """
+    Deal the turn (or river) onto the stored puzzle and recompute its probabilities.
+    The puzzle keeps its HandState between streets, so the turn only has to
+    add one card and try the 46 rivers.
+    """
+    puzzle_id = session.get('puzzle_id')
+    puzzle = puzzle_store.get(puzzle_id)
+    if puzzle is None:
+        return jsonify({"error": "no hand dealt"}), 404
+    if len(puzzle['community_cards']) not in (3, 4):
+        return jsonify({"error": "no street left to deal"}), 400
+
+    hole_cards = puzzle['hole_cards']
+    street = len(puzzle['community_cards'])
+    # The stored state is shared with concurrent requests, so deal onto a copy
+    state = puzzle.get('state') or HandState(hole_cards, puzzle['community_cards'])
+    pq = PokerQuiz()
+    with metrics.stage('deal'):
+        pq.deck.reset(state.dealt)
+        state = state.plus(pq.deal_cards(1)[0])
+    community_cards = list(state.community_cards)
+    want_outs = request.args.get('outs') in ('1', 'true')
+    with metrics.stage('probabilities'):
+        if want_outs:
+            # One enumeration gives both the probabilities and the outs
+            runouts = probabilityValidator().enumerate_runouts(hole_cards, community_cards, state,
+                                                               collect_outs=True)
+            probabilities = runout_probabilities(runouts)
+        else:
+            probabilities = pq.calculate_probabilities(hole_cards, community_cards, state)
+    # Only swap the new street in if no other request dealt one meanwhile
+    if not puzzle_store.update(puzzle_id, when=lambda stored: len(stored['community_cards']) == street,
+                               community_cards=community_cards, probabilities=probabilities,
+                               state=state, approximate=False):
+        return jsonify({"error": "the hand changed while dealing; try again"}), 409
+
+    session['quiz'] = {
+        'correct_answers': 0,
+        'total_questions': 0
+    }
+
+    response = {
+        'hole_cards': format_cards(hole_cards),
+        'community_cards': format_cards(community_cards),
+        'street': STREET_NAMES[len(community_cards)],
         'probabilities': probabilities
-    })
+    }
+    if want_outs:
+        response['outs'] = list_outs(hole_cards, community_cards, runouts=runouts)
+    return jsonify(response)
+
+@app.route('/pool_stats')
+def pool_stats():
+    """Depth, hit/miss counters and refill rate of the puzzle pool"""
+    return jsonify(puzzle_pool.stats())
+
+@app.route('/api/puzzles')
+def api_puzzles():
+    """
+    Stream n puzzles as newline-delimited JSON, one object per line, in order.
+    Query args: n (default 100), stage (preflop/flop/turn/river, default flop)
+    and seed (random if omitted; echoed in the X-Puzzle-Seed header).
+    """
+    stage = request.args.get('stage', 'flop')
+    if stage not in STAGE_CARDS:
+        return jsonify({"error": f"stage must be one of {', '.join(STAGE_CARDS)}"}), 400
+    n = request.args.get('n', 100, type=int)
+    if n is None or not 0 < n <= app.config['BULK_MAX_PUZZLES']:
+        return jsonify({"error": f"n must be between 1 and {app.config['BULK_MAX_PUZZLES']}"}), 400
+    seed = request.args.get('seed')
+    if seed is None:
+        seed = str(random.getrandbits(64))
+
+    def generate():
+        for idx, puzzle in enumerate(iter_puzzles(n, stage, seed)):
+            count_flop_lookup(puzzle.get('flop_lookup'))
+            yield json.dumps({
+                'index': idx,
+                'stage': stage,
+                'hole_cards': format_cards(puzzle['hole_cards']),
+                'community_cards': format_cards(puzzle['community_cards']),
+                'probabilities': puzzle['probabilities']
+            }) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson', headers={'X-Puzzle-Seed': seed})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Request latencies, stage timings and pool/cache counters in Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/compute_stats')
+def compute_stats():
+    """Budget hits, timeouts, late completions and cache hits of the compute offload"""
+    return jsonify(compute.stats())
 
 ########################################################################
 # Render the main quiz page
@@ -64,9 +331,7 @@ def poker_quiz_deal():
     """
     pq = PokerQuiz()
     hole_cards, community_cards = pq.deal_new_hand()
-    hole_strs = [f"{card[0]}{card[1]}" for card in hole_cards]
-    flop_strs = [f"{card[0]}{card[1]}" for card in community_cards]
-    return jsonify({"hole": hole_strs, "flop": flop_strs})
+    return jsonify({"hole": card_strs(hole_cards), "flop": card_strs(community_cards)})
 
 ########################################################################
 # (Optional) A route to "start" or "reset" a quiz session
@@ -74,36 +339,29 @@ def poker_quiz_deal():
 @app.route("/poker_quiz/start", methods=["POST"])
 def poker_quiz_start():
     session['quiz'] = {
-        'hole_cards': [],
-        'community_cards': [],
         'correct_answers': 0,
         'total_questions': 0,
         'stage': 'post'
     }
-    # If you want to deal immediately:
-    pq = PokerQuiz()
-    hole_cards = pq.deal_cards(2)
-    community_cards = pq.deal_cards(3)
-    # store in session
-    session['quiz']['hole_cards'] = hole_cards
-    session['quiz']['community_cards'] = community_cards
-    probabilities = pq.calculate_probabilities(hole_cards, community_cards)
-    session['quiz']['probabilities'] = probabilities
+    # If you want to deal immediately (stored server-side, only the id in session):
+    session['puzzle_id'], puzzle = deal_and_store()
 
     return jsonify({
-        "hole": [f"{c[0]}{c[1]}" for c in hole_cards],
-        "flop": [f"{c[0]}{c[1]}" for c in community_cards],
-        "stage": session['quiz']['stage']
+        "hole": card_strs(puzzle['hole_cards']),
+        "flop": card_strs(puzzle['community_cards']),
+        "stage": session['quiz']['stage'],
+        "approximate": puzzle.get('approximate', False)
     })
 
 ########################################################################
-# Check multiple guesses at once, using the probabilities from session
+# Check multiple guesses at once, using the stored puzzle's probabilities
 ########################################################################
 @app.route("/poker_quiz/check_all", methods=["POST"])
 def poker_quiz_check_all():
     data = request.json or {}
     all_guesses = data.get("guesses", {})
-    stored_probs = session.get('current_probabilities', {})
+    puzzle = puzzle_store.get(session.get('puzzle_id'))
+    stored_probs = puzzle['probabilities'] if puzzle else {}
 
     results = {}
     for hand_type, guessed_prob in all_guesses.items():
@@ -130,12 +388,36 @@ def exit_quiz():
     """
     Clear session and return JSON instructing front-end to go home.
     """
+    puzzle_store.delete(session.get('puzzle_id'))
     session.clear()
     return jsonify({"redirect": "/"})
 
+def list_outs(hole_cards, community_cards, state=None, runouts=None):
+    """
+    Per hand type (lowercase keys), the cards that make it on the next street
+    and the runner-runner pairs that make it by the river, as display strings.
+    Hands with neither are left out. 'runouts' is an enumerate_runouts result
+    with collect_outs already at hand; without one it is computed here.
+    """
+    if not community_cards:
+        return {}
+    if runouts is None:
+        with metrics.stage('outs'):
+            runouts = probabilityValidator().enumerate_runouts(hole_cards, community_cards, state,
+                                                               collect_outs=True)
+    outs = {}
+    for hand, out_mask in runouts['out_masks'].items():
+        pairs = runouts['two_card_combos'][hand]
+        if out_mask or pairs:
+            outs[hand.lower()] = {
+                'cards': format_cards(mask_to_ints(out_mask)),
+                'runner_runner': [format_cards(pair) for pair in pairs]
+            }
+    return outs
+
 def format_cards(cards):
-    # Cards are already in correct format, just combine rank and suit
-    return [f"{card[0]}{card[1]}" for card in cards]
+    # Cards are ints internally; the front end wants display strings like 'A♠'
+    return card_strs(cards)
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
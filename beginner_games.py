@@ -1,24 +1,21 @@
-import random
-
 # If you have a separate module for evaluating the best poker hand,
 # import it here (e.g. from hand_categorizor import categorize_hand).
 # We'll leave a placeholder method below, but replace it with your real logic.
 
 # 1) IMPORT from validator.py
 from validator import HandEvaluator  # or the real name of your validator class/function
+from cards import RANKS, SUITS, Deck, card_str
 
 class NameTheHandGame:
-    def __init__(self):
+    def __init__(self, rng=None):
         """
         Initialize ranks, suits, and a fresh deck of cards.
         This structure mimics the style used in probability_puzzles.py.
         """
-        self.ranks = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        self.suits = ['♠', '♥', '♦', '♣']
-        # Build the deck: a list of [rank, suit]
-        self.deck = [[rank, suit] for rank in self.ranks for suit in self.suits]
-        # Shuffle once at initialization
-        random.shuffle(self.deck)
+        self.ranks = RANKS
+        self.suits = SUITS
+        # Int cards 0-51, dealt at random as they're needed (see cards.Deck)
+        self.deck = Deck(rng=rng)
         
         self.correct_answers = 0
         self.total_questions = 0
@@ -41,16 +38,13 @@ class NameTheHandGame:
         """
         Deal 'num_cards' from the deck, removing them so they can't be re-dealt.
         """
-        dealt = self.deck[:num_cards]
-        self.deck = self.deck[num_cards:]
-        return dealt
+        return self.deck.deal(num_cards)
 
     def reset_deck(self):
         """
         Optionally reset and shuffle deck if you want to start a new round from a fresh deck.
         """
-        self.deck = [[rank, suit] for rank in self.ranks for suit in self.suits]
-        random.shuffle(self.deck)
+        self.deck.reset()
 
     def identify_best_hand(self, hole_cards, community_cards):
         """
@@ -79,10 +73,10 @@ class NameTheHandGame:
         # Display the cards to the console
         print("\nYour Hole Cards:")
         for c in hole_cards:
-            print(f"{c[0]}{c[1]}", end=" ")
+            print(card_str(c), end=" ")
         print("\n\nCommunity Cards:")
         for c in community_cards:
-            print(f"{c[0]}{c[1]}", end=" ")
+            print(card_str(c), end=" ")
         print("\n")
 
         # Let the user pick from the known hand options
@@ -0,0 +1,338 @@
+"""
+Benchmarks for the probability, evaluation and dealing hot paths.
+
+Fixtures are the hands in test_scenarios.json plus seeded random hands, so
+every run times the same work. Each benchmark is called repeatedly over its
+fixtures for at least --min-time seconds, per stage (flop, turn, ...) where
+that matters, and reports ops/sec and latency percentiles.
+
+    python benchmark.py                          # run, print, write benchmark_results.json
+    python benchmark.py --save-baseline          # ... and store it as the baseline
+    python benchmark.py --compare                # ... and fail if slower than the baseline
+
+A comparison fails (exit status 1) when any benchmark's median latency (in
+its fastest round) is more than --tolerance (a fraction) above the
+baseline's, or when a benchmark has no baseline entry. Baselines are only
+meaningful on the machine that recorded them, so when the baseline's
+Python version, platform or CPU count differ from this run's, the
+comparison is skipped with a warning; re-record it with --save-baseline.
+
+Cold start is measured too: 'import app' is timed in fresh interpreters and
+the run fails if its median is over --import-target-ms, or if importing app
+loads modules the request path doesn't need (numpy, tqdm, multiprocessing).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from cards import ALL_CARDS, cards_to_ints
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCENARIOS_PATH = os.path.join(HERE, 'test_scenarios.json')
+RESULTS_PATH = os.path.join(HERE, 'benchmark_results.json')
+BASELINE_PATH = os.path.join(HERE, 'benchmark_baseline.json')
+
+# Community cards per stage
+STAGES = {'flop': 3, 'turn': 4, 'river': 5}
+
+
+def load_fixtures(seed=1234, per_stage=8):
+    """{stage: [(hole cards, community cards), ...]} from test_scenarios.json and seeded deals"""
+    fixtures = {stage: [] for stage in STAGES}
+    with open(SCENARIOS_PATH) as f:
+        scenarios = json.load(f)
+    for group in scenarios.values():
+        for scenario in group.values():
+            community = cards_to_ints(scenario['community_cards'])
+            for stage, num_cards in STAGES.items():
+                if len(community) == num_cards:
+                    fixtures[stage].append((cards_to_ints(scenario['hole_cards']), community))
+    rng = random.Random(seed)
+    for _ in range(per_stage):
+        dealt = rng.sample(ALL_CARDS, 7)
+        for stage, num_cards in STAGES.items():
+            fixtures[stage].append((dealt[:2], dealt[2:2 + num_cards]))
+    return fixtures
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    idx = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def time_calls(func, fixtures, min_time=0.5, rounds=5, max_calls=100000):
+    """Call func(*fixture) round-robin over the fixtures for at least min_time seconds.
+
+    The time is split into 'rounds'; besides percentiles over every call,
+    the fastest round's median is kept as 'best_p50_ms', which is what the
+    baseline comparison uses since it is the least disturbed by other load.
+    """
+    for fixture in fixtures:
+        func(*fixture)  # warm up caches and lazy imports
+    latencies = []
+    round_medians = []
+    for _ in range(rounds):
+        round_latencies = []
+        started = time.perf_counter()
+        while True:
+            for fixture in fixtures:
+                start = time.perf_counter()
+                func(*fixture)
+                round_latencies.append(time.perf_counter() - start)
+            if time.perf_counter() - started >= min_time / rounds or len(round_latencies) >= max_calls:
+                break
+        round_medians.append(percentile(sorted(round_latencies), 0.50))
+        latencies.extend(round_latencies)
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        'calls': len(latencies),
+        'ops_per_sec': len(latencies) / total if total else float('inf'),
+        'mean_ms': total / len(latencies) * 1000,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p90_ms': percentile(latencies, 0.90) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'best_p50_ms': min(round_medians) * 1000,
+    }
+
+
+def flask_benchmarks():
+    """(name, func) pairs timing the quiz routes through Flask's test client.
+
+    The puzzle pool is bypassed so /new_hand is timed on its inline path,
+    which doesn't depend on how full the pool happens to be.
+    """
+    import app as flask_app
+
+    flask_app.puzzle_pool.get = lambda: None
+    # Exact results only, so timings don't depend on the process pool's budget
+    flask_app.compute.probabilities = lambda hole, community, **kwargs: (
+        flask_app.PokerQuiz().calculate_probabilities(hole, community), False)
+    client = flask_app.app.test_client()
+
+    def new_hand():
+        client.post('/new_hand')
+
+    def new_hand_and_turn():
+        client.post('/new_hand')
+        client.post('/next_street')
+
+    def check_all():
+        client.post('/poker_quiz/check_all', json={'guesses': {'pair': 30.0, 'two pair': 10.0}})
+
+    client.post('/new_hand')
+    return [('route /new_hand', new_hand), ('route /new_hand + /next_street', new_hand_and_turn),
+            ('route /poker_quiz/check_all', check_all)]
+
+
+# Fresh-interpreter 'import app' must stay under this median, in milliseconds
+IMPORT_TARGET_MS = 300
+# Modules the request path doesn't need, which importing app must not pull in
+HEAVY_MODULES = ('numpy', 'tqdm', 'multiprocessing')
+
+STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import app
+print(time.perf_counter() - start)
+print(' '.join(name for name in sys.argv[1:] if name in sys.modules))
+"""
+
+
+def time_startup(runs=7):
+    """Time 'import app' in fresh interpreters; returns (stats, heavy modules it imported)"""
+    import subprocess
+
+    latencies = []
+    heavy = set()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, *HEAVY_MODULES], cwd=HERE,
+                             capture_output=True, text=True, check=True).stdout.split('\n')
+        latencies.append(float(out[0]))
+        heavy.update(out[1].split())
+    latencies.sort()
+    stats = {
+        'calls': runs,
+        'ops_per_sec': runs / sum(latencies),
+        'mean_ms': sum(latencies) / runs * 1000,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p90_ms': percentile(latencies, 0.90) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'best_p50_ms': latencies[0] * 1000,
+    }
+    return stats, sorted(heavy)
+
+
+def run_benchmarks(min_time=0.5, seed=1234, name_filter=None):
+    """Run every benchmark; returns {benchmark name: stats}"""
+    from validator import probabilityValidator, HandEvaluator
+    from probability_puzzles import PokerQuiz
+
+    fixtures = load_fixtures(seed)
+    validator = probabilityValidator(1000)
+    vectorized_validator = probabilityValidator(20000)
+    evaluator = HandEvaluator()
+    quiz = PokerQuiz()
+    random.seed(seed)
+
+    staged = [
+        ('probabilityValidator.calculate_probability', validator.calculate_probability, ('flop', 'turn')),
+        ('probabilityValidator.simulate_post_flop', validator.simulate_post_flop, ('flop', 'turn')),
+        ('probabilityValidator.simulate_post_flop(vectorized)',
+         lambda hole, community: vectorized_validator.simulate_post_flop(hole, community, vectorized=True, seed=seed),
+         ('flop', 'turn')),
+        ('PokerQuiz.calculate_probabilities', quiz.calculate_probabilities, ('flop', 'turn')),
+        ('HandEvaluator.identify_best_hand', evaluator.identify_best_hand, ('flop', 'turn', 'river')),
+        ('HandEvaluator.hand_strength', evaluator.hand_strength, ('river',)),
+    ]
+    # A batch of seven-card rows, as when generating drills or datasets
+    batch_rng = random.Random(seed)
+    batch = [batch_rng.sample(ALL_CARDS, 7) for _ in range(10000)]
+    plain = [('PokerQuiz.deal_new_hand', quiz.deal_new_hand),
+             ('HandEvaluator.classify_many[10k rows]', lambda: evaluator.classify_many(batch))]
+
+    jobs = []
+    for name, func, stages in staged:
+        for stage in stages:
+            jobs.append((f"{name}[{stage}]", func, fixtures[stage]))
+    for name, func in plain:
+        jobs.append((name, func, [()]))
+    try:
+        routes = flask_benchmarks()
+    except ImportError as exc:
+        print(f"skipping Flask routes: {exc}", file=sys.stderr)
+        routes = []
+    for name, func in routes:
+        jobs.append((name, func, [()]))
+
+    results = {}
+    if not name_filter or name_filter in 'startup import app':
+        results['startup import app'], heavy = time_startup()
+        print(format_row('startup import app', results['startup import app']))
+        results['startup import app']['heavy_modules'] = heavy
+    for name, func, job_fixtures in jobs:
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = time_calls(func, job_fixtures, min_time)
+        print(format_row(name, results[name]))
+    return results
+
+
+def format_row(name, stats):
+    return (f"{name:<62} {stats['ops_per_sec']:>10.1f} ops/s  p50 {stats['p50_ms']:>8.3f} ms"
+            f"  p90 {stats['p90_ms']:>8.3f} ms  p99 {stats['p99_ms']:>8.3f} ms")
+
+
+# Baseline meta that has to match this run for a comparison to mean anything
+HOST_KEYS = ('python', 'platform', 'cpus')
+
+
+def host_mismatch(meta, baseline_meta):
+    """Descriptions of the HOST_KEYS on which a baseline differs from this run"""
+    return [f"{key} {baseline_meta.get(key)!r} != {meta[key]!r}"
+            for key in HOST_KEYS if baseline_meta.get(key) != meta[key]]
+
+
+def compare(results, baseline, tolerance):
+    """
+    Print the change in (best round) median latency per benchmark.
+    Returns:
+        tuple: (names that regressed, names with no baseline entry)
+    """
+    regressions = []
+    missing = []
+    for name, stats in results.items():
+        old = baseline.get(name)
+        if old is None:
+            print(f"{name:<62} NOT IN BASELINE")
+            missing.append(name)
+            continue
+        change = stats['best_p50_ms'] / old['best_p50_ms'] - 1 if old['best_p50_ms'] else 0.0
+        regressed = change > tolerance
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<62} p50 {old['best_p50_ms']:>8.3f} -> {stats['best_p50_ms']:>8.3f} ms "
+              f"({change:+.0%}){'  REGRESSION' if regressed else ''}")
+    return regressions, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the probability and evaluation hot paths")
+    parser.add_argument('--min-time', type=float, default=0.5, help="seconds to spend on each benchmark")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--filter', default=None, help="only run benchmarks whose name contains this")
+    parser.add_argument('--output', default=RESULTS_PATH)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the baseline")
+    parser.add_argument('--compare', action='store_true', help="fail if slower than the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help="allowed slowdown of the median before a benchmark counts as a regression")
+    parser.add_argument('--import-target-ms', type=float, default=IMPORT_TARGET_MS,
+                        help="fail if the median 'import app' time is above this")
+    args = parser.parse_args(argv)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'seed': args.seed,
+            'min_time': args.min_time,
+        },
+        'results': run_benchmarks(args.min_time, args.seed, args.filter),
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+
+    status = 0
+    startup = report['results'].get('startup import app')
+    if startup is not None:
+        if startup['heavy_modules']:
+            print(f"importing app loads {', '.join(startup['heavy_modules'])}")
+            status = 1
+        if startup['p50_ms'] > args.import_target_ms:
+            print(f"import app takes {startup['p50_ms']:.0f} ms, over the {args.import_target_ms:.0f} ms target")
+            status = 1
+        else:
+            print(f"import app takes {startup['p50_ms']:.0f} ms (target {args.import_target_ms:.0f} ms)")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"no baseline at {args.baseline}; run with --save-baseline first")
+            return 1
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatch = host_mismatch(report['meta'], baseline.get('meta', {}))
+        if mismatch:
+            print(f"warning: baseline was recorded on another host ({'; '.join(mismatch)}); "
+                  f"skipping the comparison, re-record it with --save-baseline")
+            return status
+        regressions, missing = compare(report['results'], baseline['results'], args.tolerance)
+        if not args.filter:
+            not_run = [name for name in baseline['results'] if name not in report['results']]
+            if not_run:
+                print(f"in the baseline but not run: {', '.join(not_run)}")
+        if missing:
+            print(f"{len(missing)} benchmark(s) have no baseline entry: {', '.join(missing)}")
+            status = 1
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}")
+            status = 1
+        if not (missing or regressions):
+            print("no regressions")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+Bulk puzzle generation, streamed as it finishes.
+
+Puzzles are generated in chunks on a process pool (all cores by default) and
+yielded in order as soon as each chunk is back. Only 'max_in_flight' chunks
+are outstanding at once, so memory stays flat however many puzzles are asked
+for and a slow reader simply pauses generation.
+
+Puzzle i of a seeded run is dealt from random.Random(f"{seed}:{i}"), so the
+same (n, stage, seed) always gives the same puzzles whatever the chunking or
+number of workers.
+"""
+import os
+import random
+from collections import deque
+
+from process_pool import LazyProcessPool
+from puzzle_pool import make_puzzle
+
+# The process-wide pool for bulk generation (see process_pool.py)
+bulk_pool = LazyProcessPool()
+
+
+def make_puzzles(stage, seed, start, stop):
+    """Puzzles start..stop-1 of a seeded run; runs in a pool worker"""
+    return [make_puzzle(stage, random.Random(f"{seed}:{idx}")) for idx in range(start, stop)]
+
+
+def iter_puzzles(n, stage='flop', seed=None, executor=None, chunk_size=32, max_in_flight=None):
+    """
+    Yield n puzzle dicts in order, generating up to 'max_in_flight' chunks
+    ahead of the consumer (default: two per worker).
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+    executor = executor or bulk_pool
+    if max_in_flight is None:
+        workers = getattr(executor, '_max_workers', None) or getattr(executor, 'workers', None)
+        max_in_flight = 2 * (workers or os.cpu_count() or 1)
+
+    pending = deque()
+    next_start = 0
+    try:
+        while next_start < n or pending:
+            while next_start < n and len(pending) < max_in_flight:
+                stop = min(next_start + chunk_size, n)
+                pending.append(executor.submit(make_puzzles, stage, seed, next_start, stop))
+                next_start = stop
+            yield from pending.popleft().result()
+    finally:
+        # Reader went away: drop the chunks nobody will read
+        for future in pending:
+            future.cancel()
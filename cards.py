@@ -0,0 +1,187 @@
+"""
+Compact card representation shared by the quiz, validator and games.
+
+A card is an int from 0 to 51: rank index * 4 + suit index, so the rank is
+card >> 2 (2 -> 0 ... A -> 12) and the suit is card & 3. A set of cards (a hand,
+a board, the remaining deck) is a 52-bit mask with bit 'card' set.
+
+The front end and the Flask session still use the original [rank, suit]
+format ('A♠' when shown), so convert with the helpers below at that boundary.
+"""
+import random
+from array import array
+
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+SUITS = ['♠', '♥', '♦', '♣']
+RANK_INDEX = {rank: idx for idx, rank in enumerate(RANKS)}
+SUIT_INDEX = {suit: idx for idx, suit in enumerate(SUITS)}
+# One letter per rank and suit, in index order, for range notation like 'AKs' or 'AsKd'
+RANK_CHARS = '23456789TJQKA'
+SUIT_CHARS = 'shdc'
+
+NUM_CARDS = 52
+FULL_DECK = (1 << NUM_CARDS) - 1
+ALL_CARDS = list(range(NUM_CARDS))
+
+
+def rank_of(card):
+    """Rank index of an int card (2 -> 0 ... A -> 12)"""
+    return card >> 2
+
+
+def suit_of(card):
+    """Suit index of an int card (index into SUITS)"""
+    return card & 3
+
+
+def make_card(rank_idx, suit_idx):
+    """Build an int card from rank and suit indices"""
+    return rank_idx * 4 + suit_idx
+
+
+def card_to_int(card):
+    """Convert a [rank, suit] card to its int form"""
+    rank, suit = card
+    return RANK_INDEX[rank] * 4 + SUIT_INDEX[suit]
+
+
+def int_to_card(card):
+    """Convert an int card back to [rank, suit]"""
+    return [RANKS[card >> 2], SUITS[card & 3]]
+
+
+def cards_to_ints(cards):
+    """Convert a list of [rank, suit] cards to ints"""
+    return [card_to_int(card) for card in cards]
+
+
+def ints_to_cards(cards):
+    """Convert a list of int cards to [rank, suit] lists"""
+    return [int_to_card(card) for card in cards]
+
+
+def card_str(card):
+    """Display string for an int card, e.g. 'A♠'"""
+    return RANKS[card >> 2] + SUITS[card & 3]
+
+
+def card_strs(cards):
+    """Display strings for a list of int cards"""
+    return [card_str(card) for card in cards]
+
+
+def parse_card(text):
+    """Parse a display string such as 'A♠' or '10♥' into an int card"""
+    return RANK_INDEX[text[:-1]] * 4 + SUIT_INDEX[text[-1]]
+
+
+def to_mask(cards):
+    """52-bit mask of a list of int cards"""
+    mask = 0
+    for card in cards:
+        mask |= 1 << card
+    return mask
+
+
+def mask_to_ints(mask):
+    """Int cards set in 'mask', in ascending order"""
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(low.bit_length() - 1)
+        mask ^= low
+    return cards
+
+
+def remaining_cards(dead_cards):
+    """Int cards left in the deck once 'dead_cards' are removed"""
+    return mask_to_ints(FULL_DECK & ~to_mask(dead_cards))
+
+
+class Deck:
+    """
+    A deck dealt by partial Fisher-Yates: each card dealt is a random undealt
+    card swapped to the end of the undealt part, so dealing k cards is k swaps
+    and reset() only moves the boundary back. Nothing is allocated after
+    construction except the lists deal() returns.
+
+    'cards' is a permutation of the 52 cards and 'pos' its inverse. Positions
+    [0, size) are undealt, [size, live) dealt since the last reset and
+    [live, 52) dead: excluded by the 'dead' mask and never dealt.
+
+    'rng' is any random.Random; by default the random module's shared one,
+    so random.seed() still makes deals repeatable.
+    """
+    __slots__ = ('cards', 'pos', 'size', 'live', 'dead', 'rng')
+
+    def __init__(self, dead=0, rng=None):
+        self.cards = array('B', ALL_CARDS)
+        self.pos = array('B', ALL_CARDS)
+        self.size = self.live = NUM_CARDS
+        self.dead = 0
+        self.rng = rng or random
+        if dead:
+            self.remove(dead)
+
+    def _swap(self, i, j):
+        cards, pos = self.cards, self.pos
+        a, b = cards[i], cards[j]
+        cards[i], cards[j] = b, a
+        pos[b], pos[a] = i, j
+
+    def reset(self, dead=None):
+        """
+        Put the dealt cards back. With 'dead' (a mask) the excluded cards are
+        replaced by these first; an unchanged dead set costs nothing extra.
+        """
+        if dead is not None and dead != self.dead:
+            self.size = self.live = NUM_CARDS
+            self.dead = 0
+            self.remove(dead)
+        self.size = self.live
+
+    def remove(self, mask):
+        """Take the cards in 'mask' out of play (as dead cards) until the dead set is reset"""
+        mask &= ~self.dead
+        self.dead |= mask
+        pos = self.pos
+        while mask:
+            low = mask & -mask
+            card = low.bit_length() - 1
+            mask ^= low
+            if pos[card] < self.size:
+                self.size -= 1
+                self._swap(pos[card], self.size)
+            self.live -= 1
+            self._swap(pos[card], self.live)
+
+    def deal(self, num_cards=1):
+        """Deal 'num_cards' random undealt cards"""
+        size = self.size
+        if num_cards > size:
+            raise ValueError(f"can't deal {num_cards} cards, only {size} left")
+        cards, pos, randrange = self.cards, self.pos, self.rng.randrange
+        dealt = []
+        for _ in range(num_cards):
+            i = randrange(size)
+            size -= 1
+            card, last = cards[i], cards[size]
+            cards[i], cards[size] = last, card
+            pos[last], pos[card] = i, size
+            dealt.append(card)
+        self.size = size
+        return dealt
+
+    def remaining(self):
+        """The undealt cards, in ascending order"""
+        pos, size = self.pos, self.size
+        return [card for card in ALL_CARDS if pos[card] < size]
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return iter(self.cards[:self.size])
+
+    def __contains__(self, card):
+        return self.pos[card] < self.size
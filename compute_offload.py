@@ -0,0 +1,117 @@
+"""
+Deadline-bounded probability computation for the Flask endpoints.
+
+Exact computations run in a shared process pool so a slow hand never ties up
+the request thread. If the exact answer isn't back within the request's
+budget, the caller gets a quick Monte Carlo estimate marked as approximate and
+the exact result is handed to a callback when it lands. Every outcome is
+counted so the pool can be sized from real numbers. Finished exact results are
+kept in a small LRU cache, so a hand seen again is answered immediately.
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import TimeoutError
+
+from probability_puzzles import PokerQuiz
+from process_pool import LazyProcessPool
+from validator import probabilityValidator
+
+
+def exact_probabilities(hole_cards, community_cards):
+    """(exact probabilities keyed by lowercase hand type, flop table lookup flag); runs in a pool worker"""
+    return PokerQuiz().probabilities_and_lookup(hole_cards, community_cards)
+
+
+def approximate_probabilities(hole_cards, community_cards, num_simulations=20000):
+    """Quick Monte Carlo estimate, in the same format as exact_probabilities"""
+    validator = probabilityValidator(num_simulations)
+    try:
+        raw = validator.simulate_post_flop(hole_cards, community_cards, vectorized=True)
+    except ImportError:
+        # Without numpy, fall back to a smaller pure-Python run
+        validator.num_simulations = num_simulations // 10
+        raw = validator.simulate_post_flop(hole_cards, community_cards)
+    return {hand.lower(): round(value, 2) for hand, value in raw.items()}
+
+
+class ComputeOffload:
+    def __init__(self, workers=None, budget=0.05, cache_size=4096, on_lookup=None):
+        self.workers = workers
+        self.budget = budget
+        self.cache_size = cache_size
+        # Called with each exact result's flop table 'hit'/'miss'/None, in this process
+        self.on_lookup = on_lookup
+        # (hole, community) -> exact probabilities, least recently used first
+        self._cache = OrderedDict()
+        self._pool = LazyProcessPool(workers)
+        self._lock = threading.Lock()
+        self.counters = {
+            'cache_hits': 0,
+            'submitted': 0,
+            'within_budget': 0,
+            'timeouts': 0,
+            'late_completions': 0,
+            'errors': 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def probabilities(self, hole_cards, community_cards, budget=None, on_exact=None):
+        """
+        Probabilities for a hand within 'budget' seconds.
+        Returns:
+            tuple: (probabilities, approximate). When approximate is True the
+            exact result is passed to on_exact(probabilities) once it finishes.
+        """
+        key = (tuple(sorted(hole_cards)), tuple(sorted(community_cards)))
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.counters['cache_hits'] += 1
+                return self._cache[key], False
+        budget = self.budget if budget is None else budget
+        future = self._pool.submit(exact_probabilities, hole_cards, community_cards)
+        self._count('submitted')
+        try:
+            result, lookup = future.result(timeout=budget)
+        except TimeoutError:
+            self._count('timeouts')
+            future.add_done_callback(lambda done: self._finish_late(done, key, on_exact))
+            return approximate_probabilities(hole_cards, community_cards), True
+        except Exception:
+            self._count('errors')
+            return approximate_probabilities(hole_cards, community_cards), True
+        self._count('within_budget')
+        self._record_lookup(lookup)
+        self._remember(key, result)
+        return result, False
+
+    def _record_lookup(self, lookup):
+        if self.on_lookup is not None and lookup is not None:
+            self.on_lookup(lookup)
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _finish_late(self, future, key, on_exact):
+        # Cancelled when its pool broke and was discarded; exception() would raise
+        if future.cancelled() or future.exception() is not None:
+            self._count('errors')
+            return
+        self._count('late_completions')
+        result, lookup = future.result()
+        self._record_lookup(lookup)
+        self._remember(key, result)
+        if on_exact is not None:
+            on_exact(result)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, workers=self.workers or os.cpu_count(),
+                        budget=self.budget, cached=len(self._cache))
@@ -0,0 +1,267 @@
+"""
+Offline generator for labelled puzzle datasets.
+
+Every record is a dealt hand with its exact probabilities and outs, computed
+on a process pool and written in fixed-size chunks, one .npz file per chunk:
+
+    index          (N,)    position of the record in its seeded run
+    hole_cards     (N, 2)  int8 cards (see cards.py)
+    community      (N, k)  int8 cards, k = 0, 3, 4 or 5 by stage
+    probabilities  (N, 9)  float32 percent of making each HAND_TYPES hand
+    out_masks      (N, 9)  int64 52-bit masks of the next-street outs per hand
+
+Record i of a seeded run is dealt exactly like puzzle i of bulk_puzzles (and
+/api/puzzles) with the same seed. A manifest.json next to the chunks lists
+the finished ones, so a run can be stopped and resumed, split over machines
+by index range and the parts merged afterwards:
+
+    python dataset.py generate data/ --stage flop --seed 7 --stop 100000
+    python dataset.py generate part2/ --stage flop --seed 7 --start 100000 --stop 200000
+    python dataset.py merge data/ part2/            # part2's chunks into data/
+    python dataset.py info data/
+
+Only a few chunks are in flight at once, so memory stays flat however many
+records are asked for. Load a dataset with load() or iter_chunks().
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from cards import ALL_CARDS
+from puzzle_pool import STAGE_CARDS
+from validator import HAND_TYPES, probabilityValidator
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+COLUMNS = ['index', 'hole_cards', 'community', 'probabilities', 'out_masks']
+
+
+def make_records(stage, seed, start, stop):
+    """Columns for records start..stop-1 of a seeded run; runs in a pool worker"""
+    import preflop_table
+
+    num_community = STAGE_CARDS[stage]
+    n = stop - start
+    hole = np.empty((n, 2), dtype=np.int8)
+    community = np.empty((n, num_community), dtype=np.int8)
+    probabilities = np.zeros((n, len(HAND_TYPES)), dtype=np.float32)
+    out_masks = np.zeros((n, len(HAND_TYPES)), dtype=np.int64)
+    validator = probabilityValidator()
+    for row, idx in enumerate(range(start, stop)):
+        # Same deal as puzzle_pool.make_puzzle under bulk_puzzles' seeding
+        dealt = random.Random(f"{seed}:{idx}").sample(ALL_CARDS, 2 + num_community)
+        hole[row] = dealt[:2]
+        community[row] = dealt[2:]
+        if num_community:
+            runouts = validator.enumerate_runouts(dealt[:2], dealt[2:])
+            probabilities[row] = [runouts['counts'][hand] / runouts['total'] * 100 for hand in HAND_TYPES]
+            out_masks[row] = [runouts['out_masks'][hand] for hand in HAND_TYPES]
+        else:
+            stored = preflop_table.lookup(dealt[:2])
+            if stored:
+                probabilities[row] = [stored[hand] for hand in HAND_TYPES]
+    return {'index': np.arange(start, stop, dtype=np.int64), 'hole_cards': hole, 'community': community,
+            'probabilities': probabilities, 'out_masks': out_masks}
+
+
+def chunk_name(start, stop):
+    return f"chunk_{start:010d}_{stop:010d}.npz"
+
+
+def read_manifest(directory):
+    """The manifest of a dataset directory, or None if it has none"""
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_manifest(directory, manifest):
+    manifest['chunks'].sort(key=lambda chunk: chunk['start'])
+    manifest['records'] = sum(chunk['stop'] - chunk['start'] for chunk in manifest['chunks'])
+    path = os.path.join(directory, MANIFEST_NAME)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+def new_manifest(stage, seed, chunk_size):
+    return {'version': MANIFEST_VERSION, 'stage': stage, 'seed': str(seed), 'chunk_size': chunk_size,
+            'hand_types': HAND_TYPES, 'columns': COLUMNS, 'records': 0, 'chunks': []}
+
+
+def _check_compatible(manifest, other, where):
+    for key in ('version', 'stage', 'seed', 'hand_types'):
+        if manifest[key] != other[key]:
+            raise ValueError(f"{where} has {key} {other[key]!r}, expected {manifest[key]!r}")
+
+
+def _overlaps(chunks, start, stop):
+    return any(chunk['start'] < stop and start < chunk['stop'] for chunk in chunks)
+
+
+def _uncovered(chunks, start, stop):
+    """(lo, hi) ranges of start..stop-1 that no chunk holds yet"""
+    ranges = []
+    for chunk in sorted(chunks, key=lambda chunk: chunk['start']):
+        if chunk['stop'] <= start or chunk['start'] >= stop:
+            continue
+        if chunk['start'] > start:
+            ranges.append((start, chunk['start']))
+        start = max(start, chunk['stop'])
+    if start < stop:
+        ranges.append((start, stop))
+    return ranges
+
+
+def write_chunk(directory, columns):
+    """Write one chunk atomically; returns its manifest entry"""
+    start, stop = int(columns['index'][0]), int(columns['index'][-1]) + 1
+    name = chunk_name(start, stop)
+    tmp_path = os.path.join(directory, name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, **columns)
+    os.replace(tmp_path, os.path.join(directory, name))
+    return {'start': start, 'stop': stop, 'file': name}
+
+
+def generate(directory, stage='flop', seed=0, start=0, stop=10000, chunk_size=1000,
+             workers=None, max_in_flight=None, progress=True):
+    """
+    Generate records start..stop-1 into 'directory', skipping the chunks its
+    manifest already lists. Returns the manifest.
+    """
+    if stage not in STAGE_CARDS:
+        raise ValueError(f"unknown stage {stage!r}")
+    os.makedirs(directory, exist_ok=True)
+    manifest = new_manifest(stage, seed, chunk_size)
+    existing = read_manifest(directory)
+    if existing is not None:
+        _check_compatible(existing, manifest, directory)
+        manifest = existing
+
+    todo = []
+    for lo, hi in _uncovered(manifest['chunks'], start, stop):
+        todo.extend((chunk_start, min(chunk_start + chunk_size, hi)) for chunk_start in range(lo, hi, chunk_size))
+    if progress:
+        print(f"{directory}: {manifest['records']} records present, {len(todo)} chunks to generate")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if max_in_flight is None:
+            max_in_flight = 2 * (executor._max_workers or 1)
+        pending = set()
+        todo.reverse()
+        while todo or pending:
+            while todo and len(pending) < max_in_flight:
+                pending.add(executor.submit(make_records, stage, manifest['seed'], *todo.pop()))
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                manifest['chunks'].append(write_chunk(directory, future.result()))
+                write_manifest(directory, manifest)
+                if progress:
+                    print(f"{manifest['records']} records", end='\r', flush=True)
+    if progress:
+        print()
+    write_manifest(directory, manifest)
+    return manifest
+
+
+def merge(directory, sources):
+    """Copy the chunks of other dataset directories into 'directory', skipping ranges it already has"""
+    manifest = read_manifest(directory)
+    for source in sources:
+        other = read_manifest(source)
+        if other is None:
+            raise ValueError(f"{source} has no {MANIFEST_NAME}")
+        if manifest is None:
+            os.makedirs(directory, exist_ok=True)
+            manifest = new_manifest(other['stage'], other['seed'], other['chunk_size'])
+        _check_compatible(manifest, other, source)
+        for chunk in other['chunks']:
+            if _overlaps(manifest['chunks'], chunk['start'], chunk['stop']):
+                continue
+            shutil.copyfile(os.path.join(source, chunk['file']), os.path.join(directory, chunk['file']))
+            manifest['chunks'].append(chunk)
+        write_manifest(directory, manifest)
+    return manifest
+
+
+def gaps(manifest):
+    """(start, stop) index ranges missing between the first and last chunk"""
+    missing = []
+    position = None
+    for chunk in manifest['chunks']:
+        if position is not None and chunk['start'] > position:
+            missing.append((position, chunk['start']))
+        position = chunk['stop'] if position is None else max(position, chunk['stop'])
+    return missing
+
+
+def iter_chunks(directory):
+    """Yield each chunk's columns as a dict of arrays, in index order"""
+    manifest = read_manifest(directory)
+    if manifest is None:
+        raise ValueError(f"{directory} has no {MANIFEST_NAME}")
+    for chunk in manifest['chunks']:
+        with np.load(os.path.join(directory, chunk['file'])) as data:
+            yield {column: data[column] for column in data.files}
+
+
+def load(directory):
+    """The whole dataset as one dict of arrays (it has to fit in memory)"""
+    parts = list(iter_chunks(directory))
+    if not parts:
+        return {}
+    return {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate labelled puzzle datasets")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    gen = commands.add_parser('generate', help="generate (or resume) records start..stop-1")
+    gen.add_argument('directory')
+    gen.add_argument('--stage', default='flop', choices=list(STAGE_CARDS))
+    gen.add_argument('--seed', default='0')
+    gen.add_argument('--start', type=int, default=0)
+    gen.add_argument('--stop', type=int, default=10000)
+    gen.add_argument('--chunk-size', type=int, default=1000)
+    gen.add_argument('--workers', type=int, default=None)
+
+    mrg = commands.add_parser('merge', help="copy other runs' chunks into a dataset")
+    mrg.add_argument('directory')
+    mrg.add_argument('sources', nargs='+')
+
+    inf = commands.add_parser('info', help="summarize a dataset's manifest")
+    inf.add_argument('directory')
+
+    args = parser.parse_args(argv)
+    if args.command == 'generate':
+        manifest = generate(args.directory, args.stage, args.seed, args.start, args.stop,
+                            args.chunk_size, args.workers)
+    elif args.command == 'merge':
+        manifest = merge(args.directory, args.sources)
+    else:
+        manifest = read_manifest(args.directory)
+        if manifest is None:
+            print(f"{args.directory} has no {MANIFEST_NAME}")
+            return 1
+    missing = gaps(manifest)
+    first = manifest['chunks'][0]['start'] if manifest['chunks'] else 0
+    last = manifest['chunks'][-1]['stop'] if manifest['chunks'] else 0
+    print(f"{manifest['stage']} seed {manifest['seed']}: {manifest['records']:,} records "
+          f"in {len(manifest['chunks'])} chunks covering {first}..{last - 1}")
+    if missing:
+        print("missing: " + ', '.join(f"{lo}..{hi - 1}" for lo, hi in missing))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""
+Hero-vs-range equity on top of the table evaluator.
+
+Villain ranges use the usual notation, comma separated:
+
+    QQ+  JJ-88  AKs  AKo  AK  ATs+  KTo-K7o  AsKd
+
+Equity is exact when there is a single villain and (villain combos) x
+(runouts) is at most 'exact_limit': every runout's board is evaluated once
+and every combo is added on top by broadcasting, because evaluator keys and
+suit masks are plain sums over the cards (see evaluator.evaluate_parts).
+Otherwise villain hands and runouts are sampled in vectorized batches, spread
+over seeded streams like montecarlo.py, with conflicting deals redrawn.
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from math import comb
+
+import numpy as np
+
+from cards import RANK_CHARS, SUIT_CHARS, remaining_cards, to_mask
+from evaluator import CARD_KEYS, evaluate_parts
+from vectorized import CHUNK_SIZE, RANK_BITS, sample_boards
+
+# Rounds of redrawing clashing villain hands before a sample gives up
+MAX_REDRAWS = 1000
+
+_HAND = re.compile(r'^([2-9TJQKA])([2-9TJQKA])([so]?)$')
+_COMBO = re.compile(r'^([2-9TJQKA])([shdc])([2-9TJQKA])([shdc])$')
+
+
+def _class_combos(high, low, kind):
+    """Combos of one class: a pair, or suited 's' / offsuit 'o' / both '' for high > low"""
+    if high == low:
+        return [(high * 4 + a, high * 4 + b) for a, b in combinations(range(4), 2)]
+    combos = []
+    for a in range(4):
+        for b in range(4):
+            if (kind == 's' and a != b) or (kind == 'o' and a == b):
+                continue
+            combos.append((low * 4 + b, high * 4 + a))
+    return combos
+
+
+def _parse_hand(text):
+    """(high rank, low rank, 's'/'o'/'') of a class such as 'AKs' or '99'"""
+    match = _HAND.match(text)
+    if not match:
+        raise ValueError(f"bad hand {text!r} in range")
+    high, low = sorted((RANK_CHARS.index(match[1]), RANK_CHARS.index(match[2])), reverse=True)
+    if high == low and match[3]:
+        raise ValueError(f"pair {text!r} can't be suited or offsuit")
+    return high, low, match[3]
+
+
+def _expand(token):
+    """The classes named by one range token, as (high, low, kind) tuples"""
+    if token.endswith('+'):
+        high, low, kind = _parse_hand(token[:-1])
+        if high == low:
+            return [(rank, rank, '') for rank in range(low, 13)]
+        return [(high, kicker, kind) for kicker in range(low, high)]
+    if '-' in token:
+        first, last = (_parse_hand(part) for part in token.split('-', 1))
+        if first[0] == first[1] and last[0] == last[1]:
+            lo, hi = sorted((first[0], last[0]))
+            return [(rank, rank, '') for rank in range(lo, hi + 1)]
+        if first[0] != last[0] or first[2] != last[2]:
+            raise ValueError(f"bad range {token!r}: both ends need the same top card and suitedness")
+        lo, hi = sorted((first[1], last[1]))
+        return [(first[0], kicker, first[2]) for kicker in range(lo, hi + 1)]
+    return [_parse_hand(token)]
+
+
+def parse_range(text):
+    """
+    Expand a range such as 'QQ+, AKs, KQo' into hole card combos.
+    Returns:
+        list: distinct (card, card) tuples of int cards, lower card first
+    """
+    combos = {}
+    for token in re.split(r'[,\s]+', text.strip()):
+        if not token:
+            continue
+        match = _COMBO.match(token)
+        if match:
+            cards = sorted((RANK_CHARS.index(match[1]) * 4 + SUIT_CHARS.index(match[2]),
+                            RANK_CHARS.index(match[3]) * 4 + SUIT_CHARS.index(match[4])))
+            if cards[0] == cards[1]:
+                raise ValueError(f"bad combo {token!r}: same card twice")
+            combos[tuple(cards)] = None
+            continue
+        for high, low, kind in _expand(token):
+            for combo in _class_combos(high, low, kind):
+                combos[combo] = None
+    if not combos:
+        raise ValueError(f"empty range {text!r}")
+    return list(combos)
+
+
+def _parts(cards):
+    """Rank pattern keys (N,) and suit masks (N, 4) of an (N, k) card array"""
+    cards = np.asarray(cards, dtype=np.int64)
+    keys = np.asarray(CARD_KEYS, dtype=np.int64)[cards].sum(axis=1)
+    bits = RANK_BITS[cards >> 2]
+    suited = np.stack([np.where((cards & 3) == suit, bits, 0).sum(axis=1) for suit in range(4)], axis=1)
+    return keys, suited
+
+
+def _card_masks(cards):
+    """(N,) 52-bit masks of an (N, k) card array"""
+    cards = np.asarray(cards, dtype=np.int64)
+    return np.bitwise_or.reduce(np.left_shift(1, cards), axis=1)
+
+
+def _totals(hero, villains):
+    """[wins, ties, losses, equity share] of hero strengths (N,) against (V, N) villain strengths"""
+    best = villains.max(axis=0)
+    tied = (villains == hero).sum(axis=0)
+    win = hero > best
+    tie = (hero == best)
+    return [int(win.sum()), int(tie.sum()), int((hero < best).sum()),
+            float(win.sum() + (1 / (tied[tie] + 1)).sum())]
+
+
+def _can_deal(ranges):
+    """Whether every villain can get a hand from their range without two sharing a card"""
+    masks = [sorted({to_mask(combo) for combo in combos}) for combos in sorted(ranges, key=len)]
+    dead_ends = set()
+
+    def fits(idx, used):
+        if idx == len(masks):
+            return True
+        if (idx, used) in dead_ends:
+            return False
+        for mask in masks[idx]:
+            if not mask & used and fits(idx + 1, used | mask):
+                return True
+        dead_ends.add((idx, used))
+        return False
+
+    return fits(0, 0)
+
+
+def _exact(hero_cards, board, combos):
+    """Enumerate every (combo, runout) of a single villain"""
+    deck = remaining_cards(hero_cards + board)
+    to_come = 5 - len(board)
+    runouts = np.asarray(list(combinations(deck, to_come)), dtype=np.int64).reshape(comb(len(deck), to_come), to_come)
+    board_keys, board_suited = _parts([board])
+    run_keys, run_suited = _parts(runouts)
+    run_keys = run_keys + board_keys
+    run_suited = run_suited | board_suited
+    run_masks = _card_masks(runouts)
+
+    hero_keys, hero_suited = _parts([hero_cards])
+    hero = evaluate_parts(run_keys + hero_keys, run_suited | hero_suited)
+    combo_array = np.asarray(combos, dtype=np.int64)
+    combo_keys, combo_suited = _parts(combo_array)
+    combo_masks = _card_masks(combo_array)
+
+    totals = [0, 0, 0, 0.0]
+    per_chunk = max(1, CHUNK_SIZE // len(run_keys))
+    for start in range(0, len(combos), per_chunk):
+        chunk = slice(start, start + per_chunk)
+        villain = evaluate_parts(run_keys[None, :] + combo_keys[chunk, None],
+                                 run_suited[None, :, :] | combo_suited[chunk, None, :])
+        valid = (run_masks[None, :] & combo_masks[chunk, None]) == 0
+        heroes = np.broadcast_to(hero, villain.shape)[valid]
+        for idx, value in enumerate(_totals(heroes, villain[valid][None, :])):
+            totals[idx] += value
+    return totals
+
+
+def _sample_batch(hero_cards, board, ranges, num_samples, entropy, stream):
+    """One seeded stream of sampled deals; runs in a worker process"""
+    rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(stream,)))
+    combo_arrays = [np.asarray(combos, dtype=np.int64) for combos in ranges]
+    combo_masks = [_card_masks(combos) for combos in combo_arrays]
+    deck = remaining_cards(hero_cards + board)
+    to_come = 5 - len(board)
+
+    # Villain hands: redraw every villain of a row whose hands overlap
+    picks = [rng.integers(0, len(combos), size=num_samples) for combos in combo_arrays]
+    redraw = np.arange(num_samples)
+    rounds = 0
+    while len(ranges) > 1:
+        used = np.zeros(len(redraw), dtype=np.int64)
+        clash = np.zeros(len(redraw), dtype=bool)
+        for pick, masks in zip(picks, combo_masks):
+            row_masks = masks[pick[redraw]]
+            clash |= (used & row_masks) != 0
+            used |= row_masks
+        redraw = redraw[clash]
+        if not len(redraw):
+            break
+        rounds += 1
+        if rounds > MAX_REDRAWS:
+            raise ValueError(f"villain hands still clash after {MAX_REDRAWS} redraws; the ranges barely fit together")
+        for pick, combos in zip(picks, combo_arrays):
+            pick[redraw] = rng.integers(0, len(combos), size=len(redraw))
+    villain_masks = np.zeros(num_samples, dtype=np.int64)
+    for pick, masks in zip(picks, combo_masks):
+        villain_masks |= masks[pick]
+
+    # Runouts: redraw rows that hit a villain card
+    runouts = sample_boards(deck, to_come, num_samples, rng)
+    redraw = np.flatnonzero(_card_masks(runouts) & villain_masks)
+    while len(redraw):
+        runouts[redraw] = sample_boards(deck, to_come, len(redraw), rng)
+        redraw = redraw[(_card_masks(runouts[redraw]) & villain_masks[redraw]) != 0]
+    # Board parts are shared by the hero and every villain
+    board_keys, board_suited = _parts([board])
+    keys, suited = _parts(runouts)
+    keys = keys + board_keys
+    suited = suited | board_suited
+    hero_keys, hero_suited = _parts([hero_cards])
+
+    hero = evaluate_parts(keys + hero_keys, suited | hero_suited)
+    villains = np.stack([evaluate_parts(keys + part_keys[pick], suited | part_suited[pick])
+                         for pick, (part_keys, part_suited) in
+                         zip(picks, (_parts(combos) for combos in combo_arrays))])
+    return _totals(hero, villains)
+
+
+def equity(hero_cards, villain_ranges, board=None, exact_limit=500000, num_samples=200000,
+           seed=None, workers=None, executor=None):
+    """
+    Win/tie/loss of the hero's hole cards against one or more villain ranges.
+
+    Args:
+        hero_cards: two int cards
+        villain_ranges: a range string, or a list with one range string per villain
+        board: 0-5 int community cards
+        exact_limit: enumerate exactly when a single villain's combos x runouts is at most this
+        num_samples: deals to sample otherwise, split over 'workers' seeded streams
+        seed: int seed for sampling; the same seed and workers give the same result
+        workers: number of seeded streams (and pool processes); defaults to the CPU count
+        executor: optional existing process pool for the streams
+    Returns:
+        dict: 'win', 'tie', 'loss' and 'equity' (percent, ties shared evenly),
+        the number of 'trials' and whether the result is 'exact'
+    """
+    board = list(board or [])
+    if isinstance(villain_ranges, str):
+        villain_ranges = [villain_ranges]
+    dead = to_mask(hero_cards + board)
+    ranges = []
+    for text in villain_ranges:
+        combos = [combo for combo in parse_range(text) if not to_mask(combo) & dead]
+        if not combos:
+            raise ValueError(f"range {text!r} has no combos left with these cards dealt")
+        ranges.append(combos)
+    if len(ranges) > 1 and not _can_deal(ranges):
+        raise ValueError("villain ranges can't all be dealt without sharing cards")
+
+    runouts = comb(52 - 2 - len(board) - 2, 5 - len(board))
+    exact = len(ranges) == 1 and len(ranges[0]) * runouts <= exact_limit
+    if exact:
+        wins, ties, losses, share = _exact(hero_cards, board, ranges[0])
+    else:
+        workers = workers or os.cpu_count() or 1
+        entropy = seed if seed is not None else np.random.SeedSequence().entropy
+        per_stream = -(-num_samples // workers)
+        args = [(hero_cards, board, ranges, per_stream, entropy, stream) for stream in range(workers)]
+        own_executor = executor is None and workers > 1
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        try:
+            if executor is None:
+                results = [_sample_batch(*task) for task in args]
+            else:
+                results = [future.result() for future in [executor.submit(_sample_batch, *task) for task in args]]
+        finally:
+            if own_executor:
+                executor.shutdown()
+        wins, ties, losses, share = (sum(column) for column in zip(*results))
+
+    trials = wins + ties + losses
+    return {
+        'win': wins / trials * 100,
+        'tie': ties / trials * 100,
+        'loss': losses / trials * 100,
+        'equity': share / trials * 100,
+        'trials': trials,
+        'exact': exact,
+    }
+
+
+if __name__ == "__main__":
+    import time
+    from cards import cards_to_ints
+
+    hero = cards_to_ints([["A", "♠"], ["K", "♠"]])
+    flop = cards_to_ints([["Q", "♠"], ["7", "♦"], ["2", "♠"]])
+    # About 20% of starting hands
+    top_20 = "22+, A2s+, K9s+, Q9s+, J9s+, T9s, ATo+, KTo+, QTo+, JTo"
+    print(f"{len(parse_range(top_20))} combos in {top_20}")
+    equity(hero, top_20, flop)
+    start = time.perf_counter()
+    result = equity(hero, top_20, flop)
+    print(f"AsKs vs top 20% on Qs7d2s: {result} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    start = time.perf_counter()
+    result = equity(hero, [top_20, "QQ+, AKs"], flop, seed=1)
+    print(f"three-way: {result} in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,295 @@
+"""
+Table-driven hand evaluator.
+
+Any 5, 6 or 7 int cards (see cards.py) map to a strength from 1 (seven-high)
+to 7462 (royal flush); a higher strength always beats a lower one and equal
+strengths split the pot. Two tables do the work:
+
+- FLUSH_TABLE: 13-bit mask of the ranks in the flush suit -> strength. With at
+  most seven cards a flush rules out quads and full houses, so it decides.
+- rank pattern table: every other hand depends only on how many cards of each
+  rank there are. The key packs those counts 3 bits per rank, so it is simply
+  the sum of the per-card keys.
+
+The tables are built once and cached next to this file in a small binary file
+that loads in a few milliseconds.
+"""
+import os
+import struct
+from array import array
+from bisect import bisect_right
+from itertools import combinations_with_replacement
+
+from validator import HAND_TYPES
+
+CATEGORIES = ["High Card"] + HAND_TYPES
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hand_tables.bin')
+TABLE_MAGIC = b'PPHE'
+TABLE_VERSION = 1
+
+# Per-card contribution to the rank pattern key: 3 bits of count per rank
+CARD_KEYS = [1 << (3 * (card >> 2)) for card in range(52)]
+
+_tables = None
+
+
+def _straight_top(rank_mask):
+    """Rank index of the highest straight's top card in 'rank_mask', or -1"""
+    ext = (rank_mask << 1) | (rank_mask >> 12)
+    starts = ext & (ext >> 1) & (ext >> 2) & (ext >> 3) & (ext >> 4)
+    if not starts:
+        return -1
+    return starts.bit_length() + 2
+
+
+def _descending(rank_mask):
+    """Rank indices set in 'rank_mask', highest first"""
+    return [rank for rank in range(12, -1, -1) if rank_mask >> rank & 1]
+
+
+def _flush_value(rank_mask):
+    """Comparable tuple for the best flush (or straight flush) in 'rank_mask'"""
+    top = _straight_top(rank_mask)
+    if top >= 0:
+        return (8, top)
+    return (5,) + tuple(_descending(rank_mask)[:5])
+
+
+def _rank_value(counts):
+    """Comparable tuple for the best non-flush five-card hand from rank counts"""
+    by_count = [[], [], [], [], []]
+    for rank in range(12, -1, -1):
+        by_count[counts[rank]].append(rank)
+    quads, trips, pairs, singles = by_count[4], by_count[3], by_count[2], by_count[1]
+
+    if quads:
+        kicker = max([r for r in range(13) if counts[r] and r != quads[0]])
+        return (7, quads[0], kicker)
+    if trips and len(trips) + len(pairs) >= 2:
+        # A second set of trips can fill the pair part
+        return (6, trips[0], max(trips[1:] + pairs))
+    top = _straight_top(sum(1 << r for r in range(13) if counts[r]))
+    if top >= 0:
+        return (4, top)
+    if trips:
+        return (3, trips[0]) + tuple(singles[:2])
+    if len(pairs) >= 2:
+        kicker = max(pairs[2:] + singles)
+        return (2, pairs[0], pairs[1], kicker)
+    if pairs:
+        return (1, pairs[0]) + tuple(singles[:3])
+    return (0,) + tuple(singles[:5])
+
+
+def build_tables():
+    """Generate the evaluator tables from scratch.
+
+    Returns:
+        tuple: (rank pattern keys sorted ascending, their strengths, flush table)
+    """
+    flush_values = {}
+    for mask in range(1 << 13):
+        if 5 <= mask.bit_count() <= 7:
+            flush_values[mask] = _flush_value(mask)
+
+    rank_values = {}
+    for size in (5, 6, 7):
+        for ranks in combinations_with_replacement(range(13), size):
+            counts = [0] * 13
+            for rank in ranks:
+                counts[rank] += 1
+            if max(counts) > 4:
+                continue
+            rank_values[sum(1 << (3 * rank) for rank in ranks)] = _rank_value(counts)
+
+    # Every distinct five-card hand, weakest first, gets the next strength
+    five_card = set(value for mask, value in flush_values.items() if mask.bit_count() == 5)
+    five_card.update(value for key, value in rank_values.items() if _key_size(key) == 5)
+    strength_of = {value: idx + 1 for idx, value in enumerate(sorted(five_card))}
+
+    flush_table = [0] * (1 << 13)
+    for mask, value in flush_values.items():
+        flush_table[mask] = strength_of[value]
+    keys = sorted(rank_values)
+    strengths = [strength_of[rank_values[key]] for key in keys]
+    return keys, strengths, flush_table
+
+
+def _key_size(key):
+    """Number of cards packed into a rank pattern key"""
+    size = 0
+    while key:
+        size += key & 7
+        key >>= 3
+    return size
+
+
+def save_tables(tables, path=TABLE_PATH):
+    """Write tables to 'path' atomically so concurrent workers never read a partial file"""
+    keys, strengths, flush_table = tables
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(struct.pack('<4sII', TABLE_MAGIC, TABLE_VERSION, len(keys)))
+            f.write(array('Q', keys).tobytes())
+            f.write(array('H', strengths).tobytes())
+            f.write(array('H', flush_table).tobytes())
+        os.replace(tmp_path, path)
+    except OSError:
+        # Don't leave a partial file behind (e.g. on a full disk)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_tables(path=TABLE_PATH):
+    """Read tables written by save_tables, or return None if missing, stale or corrupt"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    header = struct.calcsize('<4sII')
+    if len(data) < header:
+        return None
+    magic, version, num_keys = struct.unpack_from('<4sII', data)
+    if magic != TABLE_MAGIC or version != TABLE_VERSION:
+        return None
+    # A short or padded file is as good as stale
+    if len(data) != header + 10 * num_keys + 2 * (1 << 13):
+        return None
+    keys, strengths, flush_table = array('Q'), array('H'), array('H')
+    offset = header
+    keys.frombytes(data[offset:offset + 8 * num_keys])
+    offset += 8 * num_keys
+    strengths.frombytes(data[offset:offset + 2 * num_keys])
+    offset += 2 * num_keys
+    flush_table.frombytes(data[offset:offset + 2 * (1 << 13)])
+    return keys, strengths, flush_table
+
+
+def load_tables(path=TABLE_PATH):
+    """Load (building and caching on first use) the tables for this process"""
+    global _tables
+    if _tables is None:
+        tables = read_tables(path)
+        if tables is None:
+            tables = build_tables()
+            try:
+                save_tables(tables, path)
+            except OSError:
+                # Read-only or full disk: use the tables just built, without caching them
+                pass
+        keys, strengths, flush_table = tables
+        _tables = {
+            'keys': array('Q', keys),
+            'strengths': array('H', strengths),
+            'rank_table': dict(zip(keys, strengths)),
+            'flush_table': list(flush_table),
+        }
+    return _tables
+
+
+def evaluate(cards):
+    """Strength (1-7462, higher is better) of the best five-card hand in 5-7 int cards"""
+    tables = load_tables()
+    key = 0
+    suit_masks = [0, 0, 0, 0]
+    for card in cards:
+        key += CARD_KEYS[card]
+        suit_masks[card & 3] |= 1 << (card >> 2)
+    for suited in suit_masks:
+        if suited.bit_count() >= 5:
+            return tables['flush_table'][suited]
+    return tables['rank_table'][key]
+
+
+# Lowest strength of each category, in CATEGORIES order
+CATEGORY_FLOORS = [1, 1278, 4138, 4996, 5854, 5864, 7141, 7297, 7453, 7462]
+
+
+def category_of(strength):
+    """Name of the hand category for a strength returned by evaluate"""
+    return CATEGORIES[bisect_right(CATEGORY_FLOORS, strength) - 1]
+
+
+def _np_tables():
+    """load_tables() plus numpy copies of the tables, made on first use"""
+    import numpy as np
+
+    tables = load_tables()
+    if 'np_keys' not in tables:
+        tables['np_keys'] = np.frombuffer(tables['keys'], dtype=np.uint64).astype(np.int64)
+        tables['np_strengths'] = np.frombuffer(tables['strengths'], dtype=np.uint16)
+        tables['np_flush'] = np.asarray(tables['flush_table'], dtype=np.uint16)
+        tables['np_card_keys'] = np.asarray(CARD_KEYS, dtype=np.int64)
+        tables['np_popcount'] = np.asarray([mask.bit_count() for mask in range(1 << 13)], dtype=np.int8)
+    return tables
+
+
+def evaluate_parts(keys, suited):
+    """Vectorized evaluate from rank pattern keys and per-suit rank masks.
+
+    'keys' is an int array of sums of CARD_KEYS and 'suited' has one more
+    axis of length 4 holding the 13-bit rank mask of each suit. Both are
+    sums (ORs) over the cards, so the parts of a hand that several hands
+    share, like a board, can be computed once and combined by broadcasting.
+    Returns an array of strengths shaped like 'keys'.
+    """
+    import numpy as np
+
+    tables = _np_tables()
+    strengths = tables['np_strengths'][np.searchsorted(tables['np_keys'], keys)]
+    for suit in range(4):
+        in_suit = suited[..., suit]
+        flush = tables['np_popcount'][in_suit] >= 5
+        if flush.any():
+            strengths[flush] = tables['np_flush'][in_suit[flush]]
+    return strengths
+
+
+def evaluate_many(cards_array):
+    """Vectorized evaluate over an (N, 5..7) int array of cards.
+
+    Needs numpy; returns an (N,) uint16 array of strengths.
+    """
+    import numpy as np
+
+    tables = _np_tables()
+    cards_array = np.asarray(cards_array, dtype=np.int64)
+    keys = tables['np_card_keys'][cards_array].sum(axis=1)
+    rank_bits = np.left_shift(1, cards_array >> 2)
+    suits = cards_array & 3
+    # Cards are distinct, so summing rank bits within a suit is an OR
+    suited = np.stack([np.where(suits == suit, rank_bits, 0).sum(axis=1) for suit in range(4)], axis=1)
+    return evaluate_parts(keys, suited)
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    start = time.perf_counter()
+    load_tables()
+    print(f"Tables ready in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    hands = [random.sample(range(52), 7) for _ in range(200000)]
+    start = time.perf_counter()
+    for hand in hands:
+        evaluate(hand)
+    elapsed = time.perf_counter() - start
+    print(f"evaluate: {len(hands) / elapsed:,.0f} hands/s")
+
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None:
+        batch = np.array(hands * 5)
+        start = time.perf_counter()
+        evaluate_many(batch)
+        elapsed = time.perf_counter() - start
+        print(f"evaluate_many: {len(batch) / elapsed:,.0f} hands/s")
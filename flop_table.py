@@ -0,0 +1,241 @@
+"""
+Precomputed exact flop probabilities, indexed by suit isomorphism.
+
+Relabelling suits never changes a probability, so every (hole, flop) is mapped
+to a canonical form by one suit ordering: suits are sorted by the ranks the
+hole cards hold in them, then by the ranks the flop holds (see
+canonical_form). Its hole part is one of the 169 starting-hand classes, and
+the table stores one record per canonical (hole class, flop) slot only,
+1,286,792 in all:
+
+    header:  magic, version, number of hand types, hole classes, records
+    offsets: hole classes + 1 uint32, where each class's slots start
+    keys:    records uint16, colex flop index of each slot, ascending per class
+    records: records * 9 uint16, in hundredths of a percent;
+             MISSING marks slots not built yet
+
+The file (about 26 MB) is read through mmap, so a lookup is a binary search
+in its class's keys and a single unpack, and every worker process shares the
+same pages of the page cache. Build it offline with
+`python flop_table.py [--workers N]`: each of the 1,755 canonical flops is
+one board-centric sweep over all hole pairs. Finished flops are recorded in a
+progress file so an interrupted or partial build resumes, and missing entries
+fall back to live compute.
+"""
+import argparse
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from itertools import combinations, permutations
+from math import comb
+
+from validator import HAND_TYPES
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'flop_table.bin')
+TABLE_MAGIC = b'PPFT'
+TABLE_VERSION = 2
+HEADER = struct.Struct('<4sHHII')
+RECORD = struct.Struct(f'<{len(HAND_TYPES)}H')
+MISSING = 0xFFFF
+NUM_FLOPS = comb(52, 3)
+
+SUIT_PERMUTATIONS = [perm for perm in permutations(range(4))]
+
+
+def _relabel(cards, perm):
+    """Sorted tuple of 'cards' with suit s replaced by perm[s]"""
+    return tuple(sorted((card & ~3) | perm[card & 3] for card in cards))
+
+
+def canonical_form(hole_cards, flop_cards):
+    """
+    (hole, flop) as sorted tuples after relabelling suits in one fixed order:
+    by the hole's ranks in each suit, then the flop's, highest first. Suits
+    that tie hold the same cards, so swapping them changes nothing and every
+    relabelling of a hand lands on the same form.
+    """
+    keys = [0, 0, 0, 0]
+    for card in hole_cards:
+        keys[card & 3] |= 1 << (13 + (card >> 2))
+    for card in flop_cards:
+        keys[card & 3] |= 1 << (card >> 2)
+    perm = [0, 0, 0, 0]
+    for new_suit, suit in enumerate(sorted(range(4), key=keys.__getitem__, reverse=True)):
+        perm[suit] = new_suit
+    return _relabel(hole_cards, perm), _relabel(flop_cards, perm)
+
+
+def _hole_classes():
+    """The 169 canonical hole card tuples, in ascending order.
+
+    canonical_form gives the hole's suits first: suit 0 to the higher card
+    (both cards if suited), suit 1 to the lower one otherwise.
+    """
+    classes = [(rank * 4, rank * 4 + 1) for rank in range(13)]
+    for high in range(13):
+        for low in range(high):
+            classes.append((low * 4, high * 4))
+            classes.append((low * 4 + 1, high * 4))
+    return sorted(classes)
+
+
+# Canonical card pairs of the 169 classes (preflop_table.HOLE_LABELS are their labels)
+HOLE_CLASSES = _hole_classes()
+HOLE_CLASS_INDEX = {hole: idx for idx, hole in enumerate(HOLE_CLASSES)}
+
+
+def flop_index(flop_cards):
+    """Colex rank (0-22099) of three sorted, distinct int cards"""
+    a, b, c = flop_cards
+    return a + comb(b, 2) + comb(c, 3)
+
+
+def slot_of(hole_cards, flop_cards):
+    """Record number of the canonical slot for (hole, flop)"""
+    hole, flop = canonical_form(hole_cards, flop_cards)
+    return HOLE_CLASS_INDEX[hole] * NUM_FLOPS + flop_index(flop)
+
+
+def canonical_keys(hole_class):
+    """Ascending colex indices of the canonical flops for one hole class tuple"""
+    dead = set(hole_class)
+    deck = [card for card in range(52) if card not in dead]
+    return sorted({flop_index(canonical_form(hole_class, flop)[1]) for flop in combinations(deck, 3)})
+
+
+class FlopTable:
+    """Read-only, memory-mapped view of a built flop table"""
+
+    def __init__(self, path=TABLE_PATH, writable=False):
+        with open(path, 'r+b' if writable else 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        magic, version, num_types, num_holes, num_records = HEADER.unpack_from(self._mm, 0)
+        if (magic, version, num_types, num_holes) != (TABLE_MAGIC, TABLE_VERSION, len(HAND_TYPES), len(HOLE_CLASSES)):
+            self._mm.close()
+            raise ValueError(f"{path} is not a version {TABLE_VERSION} flop table")
+        offsets_at = HEADER.size
+        keys_at = offsets_at + 4 * (num_holes + 1)
+        self._records_at = keys_at + 2 * num_records
+        self._offsets = array('I', self._mm[offsets_at:keys_at])
+        # Keys are searched in place; the file is little-endian like the hosts we run on
+        self._keys = memoryview(self._mm)[keys_at:self._records_at].cast('H')
+
+    def position(self, slot):
+        """Record number of a canonical slot (see slot_of)"""
+        hole_idx, key = divmod(slot, NUM_FLOPS)
+        start, stop = self._offsets[hole_idx], self._offsets[hole_idx + 1]
+        pos = bisect_left(self._keys, key, start, stop)
+        if pos == stop or self._keys[pos] != key:
+            raise KeyError(f"slot {slot} is not canonical")
+        return pos
+
+    def lookup(self, hole_cards, flop_cards):
+        """Probabilities (percent, 2 decimals) keyed by hand type, or None if not built"""
+        offset = self._records_at + RECORD.size * self.position(slot_of(hole_cards, flop_cards))
+        values = RECORD.unpack_from(self._mm, offset)
+        if values[0] == MISSING:
+            return None
+        return {hand: value / 100 for hand, value in zip(HAND_TYPES, values)}
+
+    def store(self, slot, values):
+        """Write one slot's record (the table must be opened writable)"""
+        RECORD.pack_into(self._mm, self._records_at + RECORD.size * self.position(slot), *values)
+
+    def flush(self):
+        self._mm.flush()
+
+    def close(self):
+        self._keys.release()
+        self._mm.close()
+
+
+_table = None
+
+
+def get_flop_table():
+    """The process-wide FlopTable, or None when no table has been built"""
+    global _table
+    if _table is None and os.path.exists(TABLE_PATH):
+        try:
+            _table = FlopTable(TABLE_PATH)
+        except ValueError:
+            return None
+    return _table
+
+
+def canonical_flops():
+    """One flop from each suit-isomorphism class (1,755 in all), as sorted tuples"""
+    return sorted(set(min(_relabel(flop, perm) for perm in SUIT_PERMUTATIONS)
+                      for flop in combinations(range(52), 3)))
+
+
+def compute_flop(flop):
+    """Exact records for every hole pair on one flop; runs in a worker.
+
+    All 1,176 hole pairs come out of one board-centric sweep (see
+    vectorized.sweep_holes), and each is filed under its canonical slot.
+    """
+    from vectorized import sweep_holes
+
+    holes, counts, total = sweep_holes(list(flop))
+    records = {}
+    for hole, row in zip(holes.tolist(), counts.tolist()):
+        records[slot_of(hole, flop)] = [round(count * 10000 / total) for count in row]
+    return flop, list(records.items())
+
+
+def _create_empty(path):
+    """Write a table with every canonical slot MISSING"""
+    offsets, keys = [0], []
+    for hole_class in HOLE_CLASSES:
+        keys.extend(canonical_keys(hole_class))
+        offsets.append(len(keys))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(TABLE_MAGIC, TABLE_VERSION, len(HAND_TYPES), len(HOLE_CLASSES), len(keys)))
+        f.write(array('I', offsets).tobytes())
+        f.write(array('H', keys).tobytes())
+        f.write(RECORD.pack(*[MISSING] * len(HAND_TYPES)) * len(keys))
+    os.replace(tmp_path, path)
+
+
+def build_table(path=TABLE_PATH, workers=None, limit=None):
+    """Compute and write the table, skipping flops already listed in the progress file"""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    if not os.path.exists(path):
+        _create_empty(path)
+    progress_path = path + '.progress'
+    done_flops = set()
+    if os.path.exists(progress_path):
+        with open(progress_path) as f:
+            done_flops = set(int(line) for line in f if line.strip())
+    todo = [flop for flop in canonical_flops() if flop_index(flop) not in done_flops][:limit]
+    print(f"{len(todo)} flops to build")
+
+    table = FlopTable(path, writable=True)
+    try:
+        with open(progress_path, 'a') as progress, ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(compute_flop, flop) for flop in todo]
+            for done, future in enumerate(as_completed(futures), start=1):
+                flop, records = future.result()
+                for slot, values in records:
+                    table.store(slot, values)
+                # Only mark the flop done once its records are on disk
+                table.flush()
+                progress.write(f"{flop_index(flop)}\n")
+                progress.flush()
+                print(f"[{done}/{len(todo)}] flop {flop}: {len(records)} slots")
+    finally:
+        table.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the suit-isomorphic flop probability table")
+    parser.add_argument('--path', default=TABLE_PATH)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--limit', type=int, default=None, help="only build this many more flops")
+    args = parser.parse_args()
+    build_table(args.path, args.workers, args.limit)
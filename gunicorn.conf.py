@@ -0,0 +1,21 @@
+# gunicorn -c gunicorn.conf.py app:app
+#
+# The app is imported once in the master and its lookup tables loaded there
+# before the workers are forked, so every worker shares the same copy.
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1))
+preload_app = True
+
+# Every web worker starts its own compute and bulk process pools, so split the
+# cores between them instead of giving each worker a pool the size of the host.
+# Read by app.py (see its config section) unless already set.
+_per_worker = str(max(1, (os.cpu_count() or 1) // workers))
+os.environ.setdefault('FLASK_COMPUTE_WORKERS', _per_worker)
+os.environ.setdefault('FLASK_BULK_WORKERS', _per_worker)
+
+
+def when_ready(server):
+    from app import preload_tables
+    preload_tables()
@@ -1,4 +1,6 @@
 from probability_puzzles import PokerQuiz
+from cards import card_strs
+from evaluator import evaluate, category_of
 
 from enum import Enum
 class HandOutcome(Enum):
@@ -18,15 +20,29 @@ class HandOutcome(Enum):
         self.label = label
     
     def __lt__(self, other):
-        return self.ranking < other.rankin
+        return self.ranking < other.ranking
 
 
 def categorize_hand(hole_cards, community_cards):
-    pass
+    """
+    Evaluate the best five-card hand from hole_cards + community_cards (5-7 int cards).
+    Returns:
+        tuple: (HandOutcome, strength) where a higher strength beats a lower one
+    """
+    strength = evaluate(hole_cards + community_cards)
+    return outcome_of(strength), strength
+
+
+def outcome_of(strength):
+    """HandOutcome for a strength returned by evaluator.evaluate"""
+    return _OUTCOMES_BY_LABEL[category_of(strength)]
+
+
+_OUTCOMES_BY_LABEL = {outcome.label: outcome for outcome in HandOutcome}
 
 if __name__ == "__main__":
     quiz = PokerQuiz()
     hole_cards = quiz.deal_cards(2)
     community_cards = quiz.deal_cards(3)
-    print(hole_cards, community_cards)
+    print(card_strs(hole_cards), card_strs(community_cards))
     print(categorize_hand(hole_cards, community_cards))
@@ -0,0 +1,171 @@
+"""
+In-process request and stage metrics in Prometheus text format.
+
+Kept deliberately small so it can stay on in production: recording a timing
+is a bisect into a fixed bucket list and an add under a lock, and nothing
+is formatted until /metrics is scraped.
+
+    metrics = Metrics()
+    metrics.install(app)                 # per-route latency, session + JSON timing
+    with metrics.stage('deal'):          # any other stage
+        ...
+    metrics.add_collector(fn)            # fn() -> [(name, type, help, labels, value), ...]
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds in seconds, from 100 microseconds to 10 seconds
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(labels):
+    """Prometheus label set for a tuple of (name, value) pairs"""
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+
+class Histogram:
+    """Cumulative-bucket histogram of one labelled series"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        out = []
+        running = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            running += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            out.append(f"{name}_bucket{_labels(labels + (('le', le),))} {running}")
+        out.append(f"{name}_sum{_labels(labels)} {self.sum}")
+        out.append(f"{name}_count{_labels(labels)} {running}")
+        return out
+
+
+class Metrics:
+    def __init__(self, prefix='poker', buckets=DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # metric name -> help text, and (metric name, labels) -> Histogram / count
+        self._help = {}
+        self._histograms = {}
+        self._counters = {}
+        self._collectors = []
+
+    def observe(self, name, seconds, help_text='', **labels):
+        """Record one timing in the histogram 'name' with these labels"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+                self._help.setdefault(name, help_text)
+            histogram.observe(seconds)
+
+    def increment(self, name, amount=1, help_text='', **labels):
+        """Add to the counter 'name' with these labels"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+            self._help.setdefault(name, help_text)
+
+    @contextmanager
+    def stage(self, stage):
+        """Time the body of a with block as one 'stage' of request handling"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f'{self.prefix}_stage_seconds', time.perf_counter() - start,
+                         'Time spent in each stage of handling a request', stage=stage)
+
+    def add_collector(self, collector):
+        """Register fn() -> [(name, 'counter' or 'gauge', help, {labels}, value), ...], read at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self):
+        """Everything recorded so far, in Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for kind, series in (('histogram', self._histograms), ('counter', self._counters)):
+                by_name = {}
+                for (name, labels), value in sorted(series.items()):
+                    by_name.setdefault(name, []).append((labels, value))
+                for name, entries in by_name.items():
+                    lines.append(f"# HELP {name} {self._help.get(name, '')}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for labels, value in entries:
+                        if kind == 'histogram':
+                            lines.extend(value.lines(name, labels))
+                        else:
+                            lines.append(f"{name}{_labels(labels)} {value}")
+        collected = {}
+        for collector in self._collectors:
+            for name, kind, help_text, labels, value in collector():
+                collected.setdefault(name, (kind, help_text, []))[2].append(
+                    (tuple(sorted(labels.items())), value))
+        for name, (kind, help_text, entries) in collected.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in entries:
+                lines.append(f"{name}{_labels(labels)} {float(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def install(self, app):
+        """
+        Time every request per route, method and status, plus the session
+        save and JSON encoding stages, on a Flask app.
+        """
+        from flask import g, request
+        from flask.json.provider import DefaultJSONProvider
+        from flask.sessions import SecureCookieSessionInterface
+
+        metrics = self
+        request_name = f'{self.prefix}_request_duration_seconds'
+
+        @app.before_request
+        def _start_timer():
+            g._metrics_start = time.perf_counter()
+
+        @app.teardown_request
+        def _record_request(exc):
+            start = g.pop('_metrics_start', None)
+            if start is None:
+                return
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            status = g.pop('_metrics_status', 500 if exc else 200)
+            metrics.observe(request_name, time.perf_counter() - start, 'Request latency by route',
+                            route=route, method=request.method, status=status)
+
+        @app.after_request
+        def _remember_status(response):
+            g._metrics_status = response.status_code
+            return response
+
+        # The app uses Flask's default cookie sessions and JSON provider
+        class TimedSessionInterface(SecureCookieSessionInterface):
+            def save_session(self, app, session, response):
+                with metrics.stage('session_save'):
+                    return super().save_session(app, session, response)
+
+        class TimedJSONProvider(DefaultJSONProvider):
+            # Only jsonify responses; the session serializer calls dumps() on its own
+            def response(self, *args, **kwargs):
+                with metrics.stage('json_encode'):
+                    return super().response(*args, **kwargs)
+
+        app.session_interface = TimedSessionInterface()
+        app.json = TimedJSONProvider(app)
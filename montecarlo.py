@@ -0,0 +1,302 @@
+"""
+Parallel Monte Carlo estimates with reproducible seeding and early stopping.
+
+Work is split into rounds. In every round each of 'workers' streams simulates
+one batch with its own generator, seeded from (seed, stream, round), so the
+result for a given seed does not depend on which process ran which batch.
+After each round the 95% confidence half-width of every hand type is checked
+and the run stops once all of them are within the caller's tolerance.
+
+simulate_stratified is for rare hands instead: it stratifies over the next
+card and importance samples the rest of the board, so four of a kind and
+straight or royal flushes need 10-100x fewer samples for the same relative
+error, at the cost of some precision on the common hands.
+"""
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from validator import HAND_TYPES, classify_cards, count_by_hand
+from vectorized import classify_batch, simulate_counts
+
+Z_95 = 1.959964
+
+
+def wilson_half_width(successes, trials, z=Z_95):
+    """Half-width, as a fraction, of the Wilson score interval for successes/trials"""
+    if trials == 0:
+        return 1.0
+    p = successes / trials
+    denom = 1 + z * z / trials
+    return z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denom
+
+
+def _simulate_batch(known_cards, num_simulations, entropy, stream, round_idx, require_hole_cards):
+    """One batch of one stream; runs in a worker process"""
+    seed_seq = np.random.SeedSequence(entropy, spawn_key=(stream, round_idx))
+    rng = np.random.default_rng(seed_seq)
+    return simulate_counts(known_cards, num_simulations, rng, require_hole_cards)
+
+
+def simulate_parallel(hole_cards, community_cards=None, tolerance=0.25, workers=None, seed=None,
+                      batch_size=100000, max_simulations=10000000, require_hole_cards=True,
+                      executor=None):
+    """
+    Estimate the probability of every hand type until each 95% confidence
+    half-width is at most 'tolerance' percentage points.
+
+    Args:
+        workers: number of seeded streams (and pool processes); defaults to the CPU count
+        seed: int seed; the same seed and worker count give the same result
+        batch_size: simulations per stream per round
+        max_simulations: run at most this many simulations, converged or not
+        executor: optional existing process pool to submit batches to
+    Returns:
+        dict: 'probabilities' and 'half_widths' (percent), 'successes' per hand
+        type, total 'simulations', 'rounds' and whether it 'converged'
+    """
+    workers = workers or os.cpu_count() or 1
+    known_cards = hole_cards + (community_cards if community_cards else [])
+    locked = classify_cards(known_cards)[1]
+    entropy = seed if seed is not None else np.random.SeedSequence().entropy
+
+    own_executor = executor is None and workers > 1
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        mask_counts = {}
+        simulations = 0
+        round_idx = 0
+        converged = False
+        while simulations < max_simulations and not converged:
+            # The last round is cut down so the total never passes max_simulations
+            remaining = max_simulations - simulations
+            per_stream = min(batch_size, -(-remaining // workers))
+            sizes = [min(per_stream, remaining - stream * per_stream) for stream in range(workers)]
+            sizes = [size for size in sizes if size > 0]
+            args = [(known_cards, size, entropy, stream, round_idx, require_hole_cards)
+                    for stream, size in enumerate(sizes)]
+            if executor is None:
+                results = [_simulate_batch(*task) for task in args]
+            else:
+                results = [future.result() for future in
+                           [executor.submit(_simulate_batch, *task) for task in args]]
+            for counts in results:
+                for mask, freq in counts.items():
+                    mask_counts[mask] = mask_counts.get(mask, 0) + freq
+            simulations += sum(sizes)
+            round_idx += 1
+
+            successes = count_by_hand(mask_counts)
+            half_widths = {
+                hand: 0.0 if locked & (1 << idx) else 100 * wilson_half_width(successes[hand], simulations)
+                for idx, hand in enumerate(HAND_TYPES)
+            }
+            converged = max(half_widths.values()) <= tolerance
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    probabilities = {
+        hand: 100.0 if locked & (1 << idx) else successes[hand] / simulations * 100
+        for idx, hand in enumerate(HAND_TYPES)
+    }
+    return {
+        'probabilities': probabilities,
+        'half_widths': half_widths,
+        'successes': successes,
+        'simulations': simulations,
+        'rounds': round_idx,
+        'converged': converged,
+    }
+
+
+# 13-bit rank masks of every five-rank straight, the wheel included
+STRAIGHT_WINDOWS = np.asarray([0b11111 << low for low in range(9)] + [0b1000000001111], dtype=np.int64)
+POPCOUNT = np.asarray([mask.bit_count() for mask in range(1 << 13)], dtype=np.int8)
+# Weight of a card a rare-hand proposal aims at, relative to 1 for any other card
+RARE_TILT = 100.0
+# Share of every draw that is uniform, which bounds each card's likelihood ratio by 1 / UNIFORM_SHARE
+UNIFORM_SHARE = 0.35
+
+
+def _tilted_probabilities(rank_count, suit_ranks, deck, available, cards_to_come):
+    """
+    Probability of dealing each card next, for N partial boards at once.
+
+    The deal is a mixture of the uniform one and one proposal per rare hand
+    (four of a kind, full house, flush, straight, straight flush, royal
+    flush) still in reach, each giving RARE_TILT times the weight to the
+    cards that could help make that hand with 'cards_to_come' more cards.
+
+    Args:
+        rank_count: (N, 13) cards of each rank dealt so far
+        suit_ranks: (N, 4) 13-bit rank mask of each suit dealt so far
+        deck: (D,) the cards that may be dealt
+        available: (N, D) which of them each board hasn't dealt yet
+    Returns:
+        (N, D) probabilities, zero for unavailable cards
+    """
+    ranks, suits = deck >> 2, deck & 3
+    rank_bits = np.left_shift(1, ranks)
+    in_window = (rank_bits[None, :] & STRAIGHT_WINDOWS[:, None]) != 0
+    rank_mask = np.bitwise_or.reduce(suit_ranks, axis=1)
+
+    showing = rank_count[:, ranks]
+    straight_reach = (POPCOUNT[rank_mask[:, None] & STRAIGHT_WINDOWS] + cards_to_come >= 5).astype(np.int8)
+    straight = (straight_reach @ in_window.astype(np.int8) > 0) & ((rank_mask[:, None] & rank_bits) == 0)
+    # Per suit, which straight windows (the last one before the wheel is the royal) are still in reach
+    flush_reach = POPCOUNT[suit_ranks[:, :, None] & STRAIGHT_WINDOWS] + cards_to_come >= 5
+    straight_flush = np.zeros(available.shape, dtype=bool)
+    for suit in range(4):
+        straight_flush |= (flush_reach[:, suit].astype(np.int8) @ in_window.astype(np.int8) > 0) & (suits == suit)
+    targets = [
+        (showing >= 1) & (showing + cards_to_come >= 4),
+        showing >= 1,
+        POPCOUNT[suit_ranks][:, suits] + cards_to_come >= 5,
+        straight,
+        straight_flush,
+        flush_reach[:, suits, 8] & in_window[8],
+    ]
+    left = available.sum(axis=1)
+    # A proposal that singles out none, or all, of the cards left is just the uniform deal,
+    # so each board splits the tilted share between the proposals that do pick cards out
+    picked = [(target & available).sum(axis=1) for target in targets]
+    active = [(count > 0) & (count < left) for count in picked]
+    num_active = np.sum(active, axis=0)
+    uniform_share = np.where(num_active > 0, UNIFORM_SHARE, 1.0)
+    probabilities = (uniform_share / left)[:, None] * available
+    for target, count, on in zip(targets, picked, active):
+        share = np.where(on, (1 - UNIFORM_SHARE) / np.maximum(num_active, 1), 0.0)
+        total = left + (RARE_TILT - 1) * count
+        probabilities += (share / total)[:, None] * np.where(target, RARE_TILT, 1.0) * available
+    return probabilities
+
+
+def _fold(rank_count, suit_ranks, cards):
+    """Add one card per row (an (N,) array) to the rank counts and suit masks"""
+    rows = np.arange(len(cards))
+    rank_count[rows, cards >> 2] += 1
+    suit_ranks[rows, cards & 3] |= np.left_shift(1, cards >> 2)
+
+
+def _sample_stratum(known, first, deck, cards_to_come, num_samples, rng, require_hole_cards):
+    """
+    Deal the rest of the board after 'first' card by card from
+    _tilted_probabilities, which follows what each board has so far.
+    Returns:
+        tuple: (num_samples,) likelihood ratios of the uniform deal over the
+        tilted one, and (num_samples,) classification masks
+    """
+    stratum_known = np.asarray(known + [first], dtype=np.int64)
+    rest = deck[deck != first]
+    num_rest = cards_to_come - 1
+    ratio = np.ones(num_samples)
+    boards = np.empty((num_samples, num_rest), dtype=np.int64)
+    rank_count = np.zeros((num_samples, 13), dtype=np.int64)
+    suit_ranks = np.zeros((num_samples, 4), dtype=np.int64)
+    for card in stratum_known:
+        _fold(rank_count, suit_ranks, np.full(num_samples, card))
+    available = np.ones((num_samples, len(rest)), dtype=bool)
+    rows = np.arange(num_samples)
+    for step in range(num_rest):
+        probabilities = _tilted_probabilities(rank_count, suit_ranks, rest, available, num_rest - step)
+        cumulative = np.cumsum(probabilities, axis=1)
+        picks = (cumulative <= rng.random(num_samples)[:, None] * cumulative[:, -1:]).sum(axis=1)
+        picks = np.minimum(picks, len(rest) - 1)
+        # Uniform: one over the cards left; tilted: this card's probability
+        ratio /= (len(rest) - step) * probabilities[rows, picks]
+        boards[:, step] = rest[picks]
+        available[rows, picks] = False
+        _fold(rank_count, suit_ranks, rest[picks])
+    cards = np.concatenate([np.broadcast_to(stratum_known, (num_samples, len(stratum_known))), boards], axis=1)
+    made, with_hole = classify_batch(cards)
+    return ratio, with_hole if require_hole_cards else made
+
+
+def simulate_stratified(hole_cards, community_cards=None, num_simulations=1000, seed=None,
+                        require_hole_cards=True):
+    """
+    Variance-reduced estimate of every hand type's probability, for rare hands.
+
+    The next card dealt is stratified: every card left in the deck is its own
+    stratum and counts exactly 1/len(deck), however many samples it gets.
+    That frees the split of samples over strata, which follows the same
+    mixture as below, so the cards that could lead to a rare hand get most of
+    them. The rest of each board is importance sampled from a mixture of the
+    uniform deal and proposals that favour the cards a rare hand still needs
+    (see _tilted_probabilities), and each sample is reweighted by its likelihood
+    ratio, so the estimates stay unbiased. With one card to come every
+    stratum is a single river card and the result is exact.
+    Returns:
+        dict: 'probabilities', 'std_errors' (both percent) and
+        'relative_errors' (standard error over the estimate; None when the
+        estimate is 0) per hand type, and the number of 'simulations': exactly
+        num_simulations, except with one card to come, where every river
+        is dealt once, and none to come. Raises ValueError if num_simulations
+        is less than two per card left in the deck.
+    """
+    from cards import remaining_cards
+
+    known_cards = hole_cards + (community_cards if community_cards else [])
+    locked = classify_cards(known_cards)[1]
+    deck = np.asarray(remaining_cards(known_cards), dtype=np.int64)
+    cards_to_come = 7 - len(known_cards)
+    rng = np.random.default_rng(seed)
+    bits = np.asarray([1 << idx for idx in range(len(HAND_TYPES))], dtype=np.int64)
+
+    if cards_to_come == 0:
+        # Nothing to deal: the hand is what it is
+        return {
+            'probabilities': {hand: 100.0 if locked & (1 << idx) else 0.0 for idx, hand in enumerate(HAND_TYPES)},
+            'std_errors': {hand: 0.0 for hand in HAND_TYPES},
+            'relative_errors': {hand: 0.0 if locked & (1 << idx) else None for idx, hand in enumerate(HAND_TYPES)},
+            'simulations': 0,
+        }
+    if cards_to_come == 1:
+        counts = np.ones(len(deck), dtype=int)
+    else:
+        rank_count = np.zeros((1, 13), dtype=np.int64)
+        suit_ranks = np.zeros((1, 4), dtype=np.int64)
+        for card in known_cards:
+            _fold(rank_count, suit_ranks, np.asarray([card]))
+        allocation = _tilted_probabilities(rank_count, suit_ranks, deck, np.ones((1, len(deck)), dtype=bool),
+                                           cards_to_come)[0]
+        # Two per stratum for its variance, the rest split by largest remainder so the total is exact
+        spare = num_simulations - 2 * len(deck)
+        if spare < 0:
+            raise ValueError(f"num_simulations must be at least {2 * len(deck)}, two per card left")
+        share = spare * allocation
+        counts = np.floor(share).astype(int)
+        leftover = spare - int(counts.sum())
+        counts[np.argsort(counts - share)[:leftover]] += 1
+        counts += 2
+
+    means = np.zeros((len(deck), len(HAND_TYPES)))
+    variances = np.zeros((len(deck), len(HAND_TYPES)))
+    for stratum, first in enumerate(deck.tolist()):
+        ratio, masks = _sample_stratum(known_cards, first, deck, cards_to_come, int(counts[stratum]), rng,
+                                       require_hole_cards)
+        values = ratio[:, None] * ((masks[:, None] & bits) != 0)
+        means[stratum] = values.mean(axis=0)
+        if counts[stratum] > 1:
+            variances[stratum] = values.var(axis=0, ddof=1)
+    estimates = means.mean(axis=0) * 100
+    std_errors = np.sqrt((variances / counts[:, None]).sum(axis=0)) / len(deck) * 100
+
+    probabilities, errors, relative = {}, {}, {}
+    for idx, hand in enumerate(HAND_TYPES):
+        if locked & (1 << idx):
+            probabilities[hand], errors[hand], relative[hand] = 100.0, 0.0, 0.0
+            continue
+        probabilities[hand] = float(estimates[idx])
+        errors[hand] = float(std_errors[idx])
+        relative[hand] = float(std_errors[idx] / estimates[idx]) if estimates[idx] > 0 else None
+    return {
+        'probabilities': probabilities,
+        'std_errors': errors,
+        'relative_errors': relative,
+        'simulations': int(counts.sum()),
+    }
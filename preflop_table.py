@@ -0,0 +1,125 @@
+"""
+Exact preflop probabilities for the 169 starting-hand classes.
+
+Preflop, only the hole cards' ranks and whether they share a suit matter, so
+each class (AA, AKs, AKo, ...) is computed once for one representative pair:
+all C(50, 5) = 2,118,760 boards are enumerated and classified in vectorized
+chunks, counting every hand type made by the river using a hole card.
+
+The counts are small enough to live in a JSON file next to this module, so at
+runtime a preflop lookup is a dictionary hit. Rebuild it offline with
+`python preflop_table.py [--workers N]`.
+"""
+import argparse
+import json
+import os
+from itertools import chain, combinations
+from math import comb
+
+from validator import HAND_TYPES
+from cards import RANK_CHARS, remaining_cards
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'preflop_table.json')
+TABLE_VERSION = 1
+NUM_BOARDS = comb(50, 5)
+
+
+def hole_class(hole_cards):
+    """Starting-hand class label of two int cards, e.g. 'AA', 'AKs', 'T9o'"""
+    high, low = sorted(hole_cards, key=lambda card: card >> 2, reverse=True)
+    label = RANK_CHARS[high >> 2] + RANK_CHARS[low >> 2]
+    if high >> 2 == low >> 2:
+        return label
+    return label + ('s' if high & 3 == low & 3 else 'o')
+
+
+def representative(label):
+    """Two int cards belonging to a hole class label"""
+    high, low = RANK_CHARS.index(label[0]), RANK_CHARS.index(label[1])
+    suited = label.endswith('s')
+    return [high * 4, low * 4 + (0 if suited else 1)]
+
+
+# Labels of the 169 classes (flop_table.HOLE_CLASSES are card pairs instead)
+HOLE_LABELS = [hole_class([high * 4, low * 4 + suit])
+                for high in range(12, -1, -1) for low in range(high, -1, -1)
+                for suit in ((1,) if high == low else (0, 1))]
+
+
+def compute_class(label, chunk_size=1 << 17):
+    """Counts of each HAND_TYPES entry made with a hole card, over every board; runs in a worker"""
+    import numpy as np
+    from vectorized import rank_counts, suit_masks, hole_masks, classify_counts
+
+    hole = representative(label)
+    deck = np.asarray(remaining_cards(hole), dtype=np.int64)
+    picks = np.fromiter(chain.from_iterable(combinations(range(len(deck)), 5)),
+                        dtype=np.uint8, count=5 * NUM_BOARDS).reshape(-1, 5)
+    known = np.asarray([hole], dtype=np.int64)
+    known_counts = rank_counts(known)
+    known_suits = suit_masks(known)
+    hole_ranks, hole_suits = hole_masks(hole)
+
+    mask_counts = {}
+    for start in range(0, NUM_BOARDS, chunk_size):
+        boards = deck[picks[start:start + chunk_size]]
+        _, with_hole = classify_counts(rank_counts(boards) + known_counts, suit_masks(boards) | known_suits,
+                                       hole_ranks, hole_suits)
+        values, freqs = np.unique(with_hole, return_counts=True)
+        for value, freq in zip(values.tolist(), freqs.tolist()):
+            mask_counts[value] = mask_counts.get(value, 0) + freq
+    counts = [sum(freq for mask, freq in mask_counts.items() if mask >> bit & 1)
+              for bit in range(len(HAND_TYPES))]
+    return label, counts
+
+
+def build_table(path=TABLE_PATH, workers=None):
+    """Enumerate every class in parallel and write the JSON table"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    classes = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for done, (label, counts) in enumerate(pool.map(compute_class, HOLE_LABELS), start=1):
+            classes[label] = counts
+            print(f"[{done}/{len(HOLE_LABELS)}] {label}: {counts}")
+    table = {
+        'version': TABLE_VERSION,
+        'boards': NUM_BOARDS,
+        'hand_types': HAND_TYPES,
+        'classes': classes,
+    }
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(table, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+_table = None
+
+
+def load_table(path=TABLE_PATH):
+    """{class label: {hand type: probability (percent, 2 decimals)}}, or {} when not built"""
+    global _table
+    if _table is None:
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            raw = json.load(f)
+        if raw.get('version') != TABLE_VERSION or raw.get('hand_types') != HAND_TYPES:
+            return {}
+        _table = {label: {hand: round(count / raw['boards'] * 100, 2) for hand, count in zip(HAND_TYPES, counts)}
+                  for label, counts in raw['classes'].items()}
+    return _table
+
+
+def lookup(hole_cards):
+    """Preflop probabilities keyed by hand type, or None if the table isn't available"""
+    return load_table().get(hole_class(hole_cards))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the exact preflop probability table")
+    parser.add_argument('--path', default=TABLE_PATH)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    build_table(args.path, args.workers)
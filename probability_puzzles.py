@@ -1,7 +1,16 @@
-import random
 from collections import defaultdict
 from math import factorial
-from validator import probabilityValidator
+from validator import probabilityValidator, HandState
+from cards import RANKS, SUITS, Deck, card_str
+from flop_table import get_flop_table
+import preflop_table
+
+# Name of the street by number of community cards showing
+STREET_NAMES = {0: 'Preflop', 3: 'Flop', 4: 'Turn', 5: 'River'}
+
+def runout_probabilities(runouts):
+    """Lowercase hand type -> probability (percent) from probabilityValidator.enumerate_runouts"""
+    return {hand.lower(): round(count / runouts['total'] * 100, 2) for hand, count in runouts['counts'].items()}
 
 def comb(n, r):
     """Calculate combinations (n choose r)"""
@@ -10,39 +19,66 @@ def comb(n, r):
     return factorial(n) // (factorial(r) * factorial(n - r))
 
 class PokerQuiz:
-    def __init__(self):
-        self.ranks = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        self.suits = ['♠', '♥', '♦', '♣']
-        self.deck = [[rank, suit] for rank in self.ranks for suit in self.suits]
-        self.rank_values = {rank: idx for idx, rank in enumerate(self.ranks)}
+    def __init__(self, rng=None):
+        self.ranks = RANKS
+        self.suits = SUITS
+        # Cards are ints 0-51 (see cards.py); convert at the display/JSON boundary
+        self.deck = Deck(rng=rng)
         self.correct_answers = 0
         self.total_questions = 0
     
     def deal_cards(self, num_cards):
         """Deal specified number of cards from the deck and remove them."""
-        cards = random.sample(self.deck, num_cards)
-        for card in cards:
-            self.deck.remove(card)
-        return cards
+        return self.deck.deal(num_cards)
+
+    def deal_next_street(self, state):
+        """Deal the turn or river from the deck onto a HandState and return the new card"""
+        if len(state.community_cards) >= 5:
+            raise ValueError("the river has already been dealt")
+        card = self.deal_cards(1)[0]
+        state.add(card)
+        return card
 
-    def calculate_probabilities(self, hole_cards, community_cards=None):
+    def calculate_probabilities(self, hole_cards, community_cards=None, state=None):
         """
-        Use probabilityValidator to get real probabilities (requiring hole cards)
-        whenever community_cards is given.
+        Use probabilityValidator's exact runout enumeration to get real
+        probabilities (requiring hole cards) whenever community_cards is given,
+        and the precomputed preflop table when it isn't.
+        'state' is an optional HandState already holding these cards, which
+        is reused instead of rebuilding one (e.g. on the turn after the flop).
         Returns a dictionary of handName -> probability (decimal form).
         """
+        return self.probabilities_and_lookup(hole_cards, community_cards, state)[0]
+
+    def probabilities_and_lookup(self, hole_cards, community_cards=None, state=None):
+        """
+        calculate_probabilities, plus how the flop table took part: 'hit',
+        'miss' (looked up but not built), or None when it wasn't consulted.
+        Lookups often run in pool workers, so callers count this flag in
+        the process that serves metrics.
+        """
+        lookup = None
+        if community_cards and len(community_cards) == 3:
+            # Prebuilt exact flop table (see flop_table.py), when available
+            table = get_flop_table()
+            if table is not None:
+                stored = table.lookup(hole_cards, community_cards)
+                if stored:
+                    return {hand.lower(): value for hand, value in stored.items()}, 'hit'
+                lookup = 'miss'
+
         if community_cards:
             validator = probabilityValidator()
-            raw_probs = validator.get_abbreviated_probabilities(hole_cards, community_cards)
-            
-            # Convert any keys to lowercase for front-end usage
-            probabilities = {}
-            for k, v in raw_probs.items():
-                probabilities[k.lower()] = v
+            runouts = validator.enumerate_runouts(hole_cards, community_cards, state)
+            # Keys are lowercase for front-end usage
+            return runout_probabilities(runouts), lookup
 
-            return probabilities
+        # Preflop: exact per-class table (see preflop_table.py)
+        stored = preflop_table.lookup(hole_cards)
+        if stored:
+            return {hand.lower(): value for hand, value in stored.items()}, None
 
-        # If no community cards, return zero percentages or do your own logic:
+        # No table built: return zero percentages
         return {
             "pair": 0.0,
             "two pair": 0.0,
@@ -53,7 +89,7 @@ class PokerQuiz:
             "four of a kind": 0.0,
             "straight flush": 0.0,
             "royal flush": 0.0
-        }
+        }, None
 
     # def calculate_pre_flop_probabilities(self, probabilities={}, hole_cards):
     #     """Calculate probability of hitting a pair on the flop"""
@@ -72,11 +108,11 @@ class PokerQuiz:
 
     def calculate_post_flop_probabilities(self, probabilities, hole_cards, community_cards):
         """Calculate probabilities of making hands by the river using at least one hole card"""
-        hole_ranks = [card[0] for card in hole_cards]
-        hole_suits = [card[1] for card in hole_cards]
+        hole_ranks = [card >> 2 for card in hole_cards]
+        hole_suits = [card & 3 for card in hole_cards]
         all_cards = hole_cards + community_cards
-        current_ranks = [card[0] for card in all_cards]
-        current_suits = [card[1] for card in all_cards]
+        current_ranks = [card >> 2 for card in all_cards]
+        current_suits = [card & 3 for card in all_cards]
         rank_counts = defaultdict(int)
         suit_counts = defaultdict(int)
         for rank in current_ranks:
@@ -86,7 +122,7 @@ class PokerQuiz:
         # Pair calculation (only counting pairs using hole cards)
         unpaired_hole_cards = [rank for rank in hole_ranks if rank_counts[rank] == 1]
         if unpaired_hole_cards:
-            num_outs = sum(1 for card in self.deck if card[0] in unpaired_hole_cards)
+            num_outs = sum(1 for card in self.deck if card >> 2 in unpaired_hole_cards)
             cum_prob = 1
             for i in range(2):
                 cum_prob *= (47 - num_outs - i)/(47 - i)
@@ -94,10 +130,10 @@ class PokerQuiz:
         
         # Three of a kind calculation (when we have a pair using hole cards)
         paired_hole_ranks = [rank for rank in hole_ranks if rank_counts[rank] == 2 
-                            and sum(1 for card in hole_cards if card[0] == rank) > 0]
+                            and sum(1 for card in hole_cards if card >> 2 == rank) > 0]
         if paired_hole_ranks:
             paired_rank = paired_hole_ranks[0]
-            num_outs = sum(1 for card in self.deck if card[0] == paired_rank)
+            num_outs = sum(1 for card in self.deck if card >> 2 == paired_rank)
             cum_prob = 1
             for i in range(2):
                 cum_prob *= (47 - num_outs - i)/(47 - i)
@@ -107,7 +143,7 @@ class PokerQuiz:
         for hole_suit in hole_suits:
             suit_count = suit_counts[hole_suit]
             if suit_count == 4:  # Need one more for flush
-                num_outs = sum(1 for card in self.deck if card[1] == hole_suit)
+                num_outs = sum(1 for card in self.deck if card & 3 == hole_suit)
                 cum_prob = 1
                 for i in range(2):
                     cum_prob *= (47 - num_outs - i)/(47 - i)
@@ -133,7 +169,7 @@ class PokerQuiz:
 
     def count_straight_outs(self, hole_cards):
         """Count number of cards that could complete a straight"""
-        rank1, rank2 = self.rank_values[hole_cards[0][0]], self.rank_values[hole_cards[1][0]]
+        rank1, rank2 = hole_cards[0] >> 2, hole_cards[1] >> 2
         needed_ranks = set()
         
         # Find all possible straights containing both cards
@@ -143,12 +179,12 @@ class PokerQuiz:
             if rank1 in straight_ranks and rank2 in straight_ranks:
                 needed_ranks.update(straight_ranks - {rank1, rank2})
         
-        return sum(1 for card in self.deck if self.rank_values[card[0]] in needed_ranks)
+        return sum(1 for card in self.deck if card >> 2 in needed_ranks)
 
     def count_straight_outs_post_flop(self, all_cards, hole_cards):
         """Count straight outs after the flop, requiring at least one hole card"""
-        ranks = sorted([self.rank_values[card[0]] for card in all_cards])
-        hole_ranks = [self.rank_values[card[0]] for card in hole_cards]
+        ranks = sorted([card >> 2 for card in all_cards])
+        hole_ranks = [card >> 2 for card in hole_cards]
         needed_ranks = set()
         
         # For each hole card
@@ -165,18 +201,17 @@ class PokerQuiz:
         # Count total outs, including duplicates for cards that complete multiple straights
         total_outs = 0
         for rank in needed_ranks:
-            total_outs += sum(1 for card in self.deck if self.rank_values[card[0]] == rank)
+            total_outs += sum(1 for card in self.deck if card >> 2 == rank)
         
         return total_outs
 
     def count_straight_flush_outs(self, hole_cards):
         """Count number of cards that could complete a straight flush"""
-        suit = hole_cards[0][1]  # Both cards have same suit for straight flush possibility
+        suit = hole_cards[0] & 3  # Both cards have same suit for straight flush possibility
         straight_outs = self.count_straight_outs(hole_cards)
-        return sum(1 for card in self.deck if card[1] == suit and 
-                  self.rank_values[card[0]] in range(min(self.rank_values[hole_cards[0][0]], 
-                  self.rank_values[hole_cards[1][0]]) - 4, 
-                  max(self.rank_values[hole_cards[0][0]], self.rank_values[hole_cards[1][0]]) + 5))
+        return sum(1 for card in self.deck if card & 3 == suit and 
+                  card >> 2 in range(min(hole_cards[0] >> 2, hole_cards[1] >> 2) - 4, 
+                  max(hole_cards[0] >> 2, hole_cards[1] >> 2) + 5))
 
     def calculate_straight_probability(self, straight_outs):
         """Calculate probability of making a straight"""
@@ -188,18 +223,18 @@ class PokerQuiz:
 
     def calculate_royal_flush_probability(self, hole_cards):
         """Calculate probability of making a royal flush"""
-        suit = hole_cards[0][1]
-        needed_ranks = {'10', 'J', 'Q', 'K', 'A'} - {hole_cards[0][0], hole_cards[1][0]}
-        royal_outs = sum(1 for card in self.deck if card[1] == suit and card[0] in needed_ranks)
+        suit = hole_cards[0] & 3
+        needed_ranks = {8, 9, 10, 11, 12} - {hole_cards[0] >> 2, hole_cards[1] >> 2}
+        royal_outs = sum(1 for card in self.deck if card & 3 == suit and card >> 2 in needed_ranks)
         return (royal_outs / 47) * ((royal_outs - 1) / 46) * ((royal_outs - 2) / 45) * 100
 
     def calculate_full_house_probability(self, hole_cards):
         """Calculate probability of making a full house"""
-        if hole_cards[0][0] == hole_cards[1][0]:
+        if hole_cards[0] >> 2 == hole_cards[1] >> 2:
             # Already have a pair
-            remaining_ranks = set(card[0] for card in self.deck)
-            trip_prob = len([c for c in self.deck if c[0] == hole_cards[0][0]]) / 47
-            pair_prob = sum(len([c for c in self.deck if c[0] == r]) / 47 for r in remaining_ranks)
+            remaining_ranks = set(card >> 2 for card in self.deck)
+            trip_prob = len([c for c in self.deck if c >> 2 == hole_cards[0] >> 2]) / 47
+            pair_prob = sum(len([c for c in self.deck if c >> 2 == r]) / 47 for r in remaining_ranks)
             return trip_prob * pair_prob * 100
         else:
             # Need to make two pair and then boat
@@ -219,14 +254,32 @@ class PokerQuiz:
         hole_cards = self.deal_cards(2)
         community_cards = self.deal_cards(3) if stage == 'post' else None
         
-        print(f"\nYour hole cards are: {hole_cards[0][0]}{hole_cards[0][1]} {hole_cards[1][0]}{hole_cards[1][1]}")
-        if community_cards:
-            print(f"Flop cards are: {' '.join(f'{card[0]}{card[1]}' for card in community_cards)}")
-        
-        actual_probabilities = self.calculate_probabilities(hole_cards, community_cards)
-        
+        print(f"\nYour hole cards are: {card_str(hole_cards[0])} {card_str(hole_cards[1])}")
+        if not community_cards:
+            return self.ask_probabilities(self.calculate_probabilities(hole_cards))
+
+        # Flop, then optionally the turn and river, each street building on the last one's state
+        state = HandState(hole_cards, community_cards)
+        while True:
+            street = STREET_NAMES[len(state.community_cards)]
+            print(f"{street} cards are: {' '.join(card_str(card) for card in state.community_cards)}")
+            if len(state.community_cards) == 5:
+                return True
+            actual_probabilities = self.calculate_probabilities(hole_cards, state.community_cards, state)
+            if not self.ask_probabilities(actual_probabilities):
+                return False
+            answer = input("\nDeal the next street? (y/n, or 'exit' to end) ").lower()
+            if answer == 'exit':
+                self.show_summary()
+                return False
+            if answer != 'y':
+                return True
+            self.deal_next_street(state)
+
+    def ask_probabilities(self, actual_probabilities):
+        """Quiz every possible hand; returns False if the player typed 'exit'"""
         for hand, actual_prob in actual_probabilities.items():
-            if actual_prob > 0:  # Only quiz on possible hands
+            if 0 < actual_prob < 100:  # Only quiz on hands still in doubt
                 while True:
                     try:
                         guess = input(f"\nWhat is the probability (in %) of making a {hand} by the river? (or 'exit' to end) ")
@@ -262,22 +315,20 @@ class PokerQuiz:
 
     def deal_new_hand(self):
         """Deal a new hand of poker with hole cards and community cards"""
-        # Reset and shuffle deck
-        self.deck = [[rank, suit] for rank in self.ranks for suit in self.suits]
-        random.shuffle(self.deck)
+        # Put every card back
+        self.deck.reset(0)
         
         # Deal 2 hole cards
-        hole_cards = [self.deck.pop() for _ in range(2)]
+        hole_cards = self.deck.deal(2)
         
         # Deal 3 community cards (flop)
-        community_cards = [self.deck.pop() for _ in range(3)]
+        community_cards = self.deck.deal(3)
         
         return hole_cards, community_cards
 
 def display_card(card):
     """Display a card in a visually appealing format"""
-    rank, suit = card
-    return f"[{rank}{suit}]"
+    return f"[{card_str(card)}]"
 
 def display_hand(hole_cards, community_cards=None):
     """Display the hole cards and community cards with clear separation"""
@@ -0,0 +1,59 @@
+"""
+Lazily created, fork-aware process pool shared by the request-time helpers.
+
+The pool is only started when work first arrives, so importing the app stays
+cheap (multiprocessing is slow to import), and it is started again in a
+forked child, which can't use its parent's pool. When a worker dies the
+executor is broken for good and every later submit would fail, so a broken
+pool is dropped and the next submit gets a fresh one.
+"""
+import os
+import threading
+
+
+class LazyProcessPool:
+    def __init__(self, workers=None):
+        self.workers = workers
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """The executor for this process, created on first use (and again after a fork or a crash)"""
+        # Imported here: multiprocessing is slow to import and only needed once work arrives
+        from concurrent.futures import ProcessPoolExecutor
+
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._pid = os.getpid()
+            return self._executor
+
+    def discard(self, executor):
+        """Drop 'executor' if it is still the current one, so the next get() starts a new pool"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn, *args, **kwargs):
+        """Submit to the pool, replacing it first if it has broken"""
+        from concurrent.futures.process import BrokenProcessPool
+
+        executor = self.get()
+        try:
+            future = executor.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            self.discard(executor)
+            executor = self.get()
+            future = executor.submit(fn, *args, **kwargs)
+        # A worker dying mid-task breaks the pool; replace it before the next submit
+        future.add_done_callback(lambda done: self._check(done, executor))
+        return future
+
+    def _check(self, future, executor):
+        from concurrent.futures.process import BrokenProcessPool
+
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self.discard(executor)
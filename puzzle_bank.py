@@ -0,0 +1,197 @@
+"""
+Bank of every canonical flop puzzle, indexed for filtered sampling.
+
+Each entry is one canonical (hole, flop) slot of flop_table.py with its exact
+probabilities and weight, the number of real deals it stands for. For every
+hand type the entries are also kept sorted by (number of non-trivial hand
+types, probability of that hand), so a filter such as
+
+    bank.sample(category='Flush', low=30, high=40, min_categories=3)
+
+is a handful of binary searches for the matching ranges, then a random pick
+inside them. Picks are weighted like real deals (by rejection, which takes a
+few tries at most), and get random suits and card order when served.
+
+A hand type is non-trivial when its probability is strictly between 0 and
+100%, i.e. the quiz would ask about it. Build the bank offline with
+`python puzzle_bank.py [--workers N] [--limit FLOPS]`; without a bank file,
+get_puzzle_bank() returns None.
+"""
+import argparse
+import os
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from math import comb
+
+import numpy as np
+
+from flop_table import HOLE_CLASSES, NUM_FLOPS, SUIT_PERMUTATIONS, canonical_flops, slot_of
+from validator import HAND_TYPES
+
+BANK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'puzzle_bank.npz')
+BANK_VERSION = 1
+FULL = 10000  # probabilities are stored in hundredths of a percent
+
+
+def _flop_of(index):
+    """Inverse of flop_table.flop_index: the sorted flop with this colex rank"""
+    cards = []
+    for size in (3, 2, 1):
+        card = size - 1
+        while comb(card + 1, size) <= index:
+            card += 1
+        index -= comb(card, size)
+        cards.append(card)
+    return cards[::-1]
+
+
+def bank_flop(flop):
+    """(slots, records, deals) of every canonical slot on one canonical flop; runs in a worker"""
+    from vectorized import sweep_holes
+
+    holes, counts, total = sweep_holes(list(flop))
+    # Real flops in this flop's suit class, each dealt with the same hole pairs
+    orbit = len(set(tuple(sorted((card & ~3) | perm[card & 3] for card in flop)) for perm in SUIT_PERMUTATIONS))
+    records = {}
+    deals = {}
+    for hole, row in zip(holes.tolist(), counts.tolist()):
+        slot = slot_of(hole, flop)
+        records[slot] = [round(count * FULL / total) for count in row]
+        deals[slot] = deals.get(slot, 0) + orbit
+    return list(records), list(records.values()), [deals[slot] for slot in records]
+
+
+def build_bank(path=BANK_PATH, workers=None, limit=None):
+    """Compute every canonical slot (or those of the first 'limit' flops) and write the bank"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    flops = canonical_flops()[:limit]
+    slots, records, deals = [], [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for done, (flop_slots, flop_records, flop_deals) in enumerate(pool.map(bank_flop, flops), start=1):
+            slots.extend(flop_slots)
+            records.extend(flop_records)
+            deals.extend(flop_deals)
+            print(f"[{done}/{len(flops)}] {len(slots)} puzzles", end='\r', flush=True)
+    print()
+
+    slots = np.asarray(slots, dtype=np.int64)
+    hole = np.asarray(HOLE_CLASSES, dtype=np.int8)[slots // NUM_FLOPS]
+    flop = np.asarray([_flop_of(index) for index in (slots % NUM_FLOPS).tolist()], dtype=np.int8).reshape(-1, 3)
+    probs = np.asarray(records, dtype=np.uint16).reshape(-1, len(HAND_TYPES))
+    nontrivial = ((probs > 0) & (probs < FULL)).sum(axis=1).astype(np.int8)
+    # Per hand type: entries by (non-trivial count, probability)
+    order = np.stack([np.lexsort((probs[:, idx], nontrivial)) for idx in range(len(HAND_TYPES))]).astype(np.int32)
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, version=np.asarray(BANK_VERSION), hole=hole, flop=flop, probs=probs,
+             weight=np.asarray(deals, dtype=np.uint32), nontrivial=nontrivial, order=order,
+             sorted_probs=np.take_along_axis(probs.T, order, axis=1))
+    os.replace(tmp_path, path)
+    print(f"{len(slots)} puzzles written to {path}")
+
+
+class PuzzleBank:
+    """Read-only bank loaded from a file written by build_bank"""
+
+    def __init__(self, path=BANK_PATH):
+        with np.load(path) as data:
+            if int(data['version']) != BANK_VERSION:
+                raise ValueError(f"{path} is not a version {BANK_VERSION} puzzle bank")
+            for name in ('hole', 'flop', 'probs', 'weight', 'nontrivial', 'order', 'sorted_probs'):
+                setattr(self, name, data[name])
+        self.max_weight = int(self.weight.max()) if len(self.weight) else 0
+        # Where each non-trivial count starts in every hand type's order
+        self._starts = [np.searchsorted(self.nontrivial[order], np.arange(len(HAND_TYPES) + 2)).tolist()
+                        for order in self.order]
+
+    def __len__(self):
+        return len(self.weight)
+
+    def _ranges(self, category, low, high, min_categories, max_categories):
+        """(hand type index, [(start, stop), ...]) of the matching positions in its order"""
+        idx = 0
+        if category is not None:
+            names = [hand.lower() for hand in HAND_TYPES]
+            if category.lower() not in names:
+                raise ValueError(f"unknown hand type {category!r}")
+            idx = names.index(category.lower())
+        if not 0 <= low <= high <= 100:
+            raise ValueError(f"bad probability band {low}-{high}")
+        lo, hi = round(low * 100), round(high * 100)
+        starts = self._starts[idx]
+        sorted_probs = self.sorted_probs[idx]
+        ranges = []
+        for count in range(max(min_categories, 0), min(max_categories, len(HAND_TYPES)) + 1):
+            start, stop = starts[count], starts[count + 1]
+            if category is not None:
+                start, stop = (start + int(np.searchsorted(sorted_probs[start:stop], lo, side='left')),
+                               start + int(np.searchsorted(sorted_probs[start:stop], hi, side='right')))
+            if start < stop:
+                ranges.append((start, stop))
+        return idx, ranges
+
+    def count(self, category=None, low=0.0, high=100.0, min_categories=0, max_categories=len(HAND_TYPES)):
+        """Number of entries matching a filter (see sample)"""
+        return sum(stop - start for start, stop in self._ranges(category, low, high, min_categories, max_categories)[1])
+
+    def sample(self, category=None, low=0.0, high=100.0, min_categories=0, max_categories=len(HAND_TYPES),
+               rng=None):
+        """
+        A random puzzle whose 'category' hand type has a probability in
+        [low, high] percent and which has between min_categories and
+        max_categories non-trivial hand types, or None if none match.
+        Returns a dict like puzzle_pool.make_puzzle.
+        """
+        rng = rng or random
+        idx, ranges = self._ranges(category, low, high, min_categories, max_categories)
+        if not ranges:
+            return None
+        order = self.order[idx]
+        cumulative = list(accumulate(stop - start for start, stop in ranges))
+        while True:
+            # Uniform over the matching entries, then accept in proportion to the deals each stands for
+            pick = rng.randrange(cumulative[-1])
+            bucket = bisect_right(cumulative, pick)
+            start = ranges[bucket][0]
+            entry = int(order[start + pick - (cumulative[bucket - 1] if bucket else 0)])
+            if rng.random() * self.max_weight < self.weight[entry]:
+                break
+        return self.puzzle(entry, rng)
+
+    def puzzle(self, entry, rng=None):
+        """Entry 'entry' as a puzzle dict, with randomly relabelled suits and card order"""
+        rng = rng or random
+        perm = rng.choice(SUIT_PERMUTATIONS)
+        hole_cards = [(card & ~3) | perm[card & 3] for card in self.hole[entry].tolist()]
+        community_cards = [(card & ~3) | perm[card & 3] for card in self.flop[entry].tolist()]
+        rng.shuffle(hole_cards)
+        rng.shuffle(community_cards)
+        return {
+            'hole_cards': hole_cards,
+            'community_cards': community_cards,
+            'probabilities': {hand.lower(): value / 100 for hand, value in zip(HAND_TYPES, self.probs[entry].tolist())},
+        }
+
+
+_bank = None
+
+
+def get_puzzle_bank():
+    """The process-wide PuzzleBank, or None when no bank has been built"""
+    global _bank
+    if _bank is None and os.path.exists(BANK_PATH):
+        try:
+            _bank = PuzzleBank(BANK_PATH)
+        except ValueError:
+            return None
+    return _bank
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the difficulty-indexed flop puzzle bank")
+    parser.add_argument('--path', default=BANK_PATH)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--limit', type=int, default=None, help="only use this many canonical flops")
+    args = parser.parse_args()
+    build_bank(args.path, args.workers, args.limit)
@@ -0,0 +1,144 @@
+"""
+Background pool of ready-made puzzles.
+
+Worker threads keep a queue of (hole, flop, probabilities) entries topped up so
+a request can just pop one. Refilling starts when the depth falls to
+'low_water' and continues until 'target_depth' is reached again. When the pool
+is empty the caller computes inline, and that miss is counted.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from cards import ALL_CARDS
+from probability_puzzles import PokerQuiz
+
+logger = logging.getLogger(__name__)
+
+# Community cards showing at each stage of a puzzle
+STAGE_CARDS = {'preflop': 0, 'flop': 3, 'turn': 4, 'river': 5}
+
+
+def make_puzzle(stage='flop', rng=None):
+    """Deal a hand at 'stage' (using rng, a random.Random, if given) and compute its probabilities"""
+    pq = PokerQuiz()
+    dealt = (rng or random).sample(ALL_CARDS, 2 + STAGE_CARDS[stage])
+    hole_cards, community_cards = dealt[:2], dealt[2:]
+    probabilities, lookup = pq.probabilities_and_lookup(hole_cards, community_cards)
+    return {
+        'hole_cards': hole_cards,
+        'community_cards': community_cards,
+        'probabilities': probabilities,
+        # Flop table 'hit'/'miss' (or None), counted by whoever serves the puzzle
+        'flop_lookup': lookup,
+    }
+
+
+class PuzzlePool:
+    def __init__(self, target_depth=32, low_water=8, workers=1, generate=make_puzzle):
+        self.target_depth = target_depth
+        self.low_water = low_water
+        self.workers = workers
+        self.generate = generate
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._refilling = True
+        self._pid = None
+        self._stopping = False
+        # Completion times of recent puzzles, for the refill rate
+        self._recent = deque(maxlen=4096)
+        self.generated = 0
+        self.served = 0
+        self.misses = 0
+        self.errors = 0
+        # Seconds to wait after a failed generate(), doubled per failure in a row
+        self.backoff = 0.1
+        self.max_backoff = 30.0
+
+    def start(self):
+        """Start the worker threads in this process (again after a fork)"""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        if self._pid is not None:
+            # Forked from a process with a running pool: its threads didn't come along,
+            # and its queued puzzles would be served by every sibling worker too
+            self._cond = threading.Condition()
+            self._queue.clear()
+        with self._cond:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self._stopping = False
+            self._refilling = True
+        for idx in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"puzzle-pool-{idx}", daemon=True)
+            thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._pid = None
+            self._cond.notify_all()
+
+    def _run(self):
+        delay = self.backoff
+        while True:
+            with self._cond:
+                while not self._stopping and not self._refilling:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+            try:
+                puzzle = self.generate()
+            except Exception:
+                # Keep the worker alive (requests fall back to inline compute meanwhile)
+                logger.exception("puzzle generation failed; retrying in %.1f s", delay)
+                with self._cond:
+                    self.errors += 1
+                    self._cond.wait(delay)
+                delay = min(delay * 2, self.max_backoff)
+                continue
+            delay = self.backoff
+            with self._cond:
+                self._queue.append(puzzle)
+                self.generated += 1
+                self._recent.append(time.monotonic())
+                if len(self._queue) >= self.target_depth:
+                    self._refilling = False
+
+    def get(self):
+        """Pop a ready puzzle, or return None (and count a miss) if the pool is empty"""
+        self.start()
+        with self._cond:
+            if self._queue:
+                puzzle = self._queue.popleft()
+                self.served += 1
+            else:
+                puzzle = None
+                self.misses += 1
+            if len(self._queue) <= self.low_water and not self._refilling:
+                self._refilling = True
+                self._cond.notify_all()
+            return puzzle
+
+    def stats(self, window=10.0):
+        """Depth, counters and puzzles generated per second over the last 'window' seconds"""
+        now = time.monotonic()
+        with self._cond:
+            recent = sum(1 for stamp in self._recent if now - stamp <= window)
+            return {
+                'depth': len(self._queue),
+                'target_depth': self.target_depth,
+                'low_water': self.low_water,
+                'workers': self.workers,
+                'refilling': self._refilling,
+                'generated': self.generated,
+                'served': self.served,
+                'misses': self.misses,
+                'errors': self.errors,
+                'refill_rate': recent / window,
+            }
@@ -0,0 +1,74 @@
+"""
+Server-side storage for dealt puzzles.
+
+The Flask session only carries a short puzzle id; the cards and probabilities
+stay here, so the signed cookie stays the same small size on every request.
+Entries expire 'ttl' seconds after they were last used, and the least recently
+used ones are dropped once 'max_entries' is reached.
+"""
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+
+class PuzzleStore:
+    def __init__(self, ttl=3600, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # puzzle id -> (last used, puzzle), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, puzzle):
+        """Store a puzzle dict and return its new id"""
+        puzzle_id = secrets.token_urlsafe(8)
+        with self._lock:
+            self._evict(time.monotonic())
+            self._entries[puzzle_id] = (time.monotonic(), puzzle)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return puzzle_id
+
+    def get(self, puzzle_id):
+        """The stored puzzle, or None if the id is unknown or expired"""
+        if puzzle_id is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(puzzle_id)
+            if entry is None:
+                return None
+            if now - entry[0] > self.ttl:
+                del self._entries[puzzle_id]
+                return None
+            self._entries[puzzle_id] = (now, entry[1])
+            self._entries.move_to_end(puzzle_id)
+            return entry[1]
+
+    def update(self, puzzle_id, when=None, **fields):
+        """
+        Merge fields into a stored puzzle; returns False if it is gone, or if
+        when(puzzle) is given and says it has moved on
+        """
+        with self._lock:
+            entry = self._entries.get(puzzle_id)
+            if entry is None or (when is not None and not when(entry[1])):
+                return False
+            entry[1].update(fields)
+            return True
+
+    def delete(self, puzzle_id):
+        with self._lock:
+            self._entries.pop(puzzle_id, None)
+
+    def _evict(self, now):
+        """Drop expired entries from the least recently used end"""
+        while self._entries:
+            puzzle_id, (last_used, _) = next(iter(self._entries.items()))
+            if now - last_used <= self.ttl:
+                break
+            del self._entries[puzzle_id]
+
+    def __len__(self):
+        return len(self._entries)
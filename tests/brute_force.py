@@ -0,0 +1,108 @@
+"""
+Slow, obviously-correct references the fast code is checked against.
+
+Nothing here shares code with the modules under test: hand types are found
+by trying every small subset of the cards, and hands are ranked by sorting
+every five-card subset.
+"""
+from collections import Counter
+from itertools import combinations
+
+from validator import HAND_TYPES
+
+
+def _straight_high(ranks):
+    """High rank of five distinct ranks forming a straight (the wheel is 3), or None"""
+    ranks = sorted(set(ranks))
+    if len(ranks) != 5:
+        return None
+    if ranks == [0, 1, 2, 3, 12]:
+        return 3
+    if ranks[4] - ranks[0] == 4:
+        return ranks[4]
+    return None
+
+
+def _patterns(cards):
+    """The HAND_TYPES a group of cards is on its own (a pair is two cards, a straight five, ...)"""
+    ranks = [card >> 2 for card in cards]
+    counts = sorted(Counter(ranks).values(), reverse=True)
+    found = set()
+    if len(cards) == 2 and counts == [2]:
+        found.add("Pair")
+    if len(cards) == 3 and counts == [3]:
+        found.add("Three of a Kind")
+    if len(cards) == 4 and counts == [2, 2]:
+        found.add("Two Pair")
+    if len(cards) == 4 and counts == [4]:
+        found.add("Four of a Kind")
+    if len(cards) == 5:
+        if counts == [3, 2]:
+            found.add("Full House")
+        straight = _straight_high(ranks)
+        flush = len({card & 3 for card in cards}) == 1
+        if straight is not None:
+            found.add("Straight")
+        if flush:
+            found.add("Flush")
+        if straight is not None and flush:
+            found.add("Straight Flush")
+            if straight == 12:
+                found.add("Royal Flush")
+    return found
+
+
+def classify(cards, num_hole=2):
+    """(made, made_with_hole) as sets of HAND_TYPES, like validator.classify_cards"""
+    hole = set(cards[:num_hole])
+    made, with_hole = set(), set()
+    for size in (2, 3, 4, 5):
+        for group in combinations(cards, size):
+            found = _patterns(group)
+            made |= found
+            if hole & set(group):
+                with_hole |= found
+    return made, with_hole
+
+
+def runout_counts(hole_cards, community_cards):
+    """{hand type: runouts making it with a hole card}, and the number of runouts"""
+    deck = [card for card in range(52) if card not in hole_cards + community_cards]
+    counts = dict.fromkeys(HAND_TYPES, 0)
+    total = 0
+    for runout in combinations(deck, 5 - len(community_cards)):
+        total += 1
+        for hand in classify(hole_cards + community_cards + list(runout))[1]:
+            counts[hand] += 1
+    return counts, total
+
+
+def rank_five(cards):
+    """Comparable value of a five-card hand: (category, ranks that break ties)"""
+    ranks = sorted((card >> 2 for card in cards), reverse=True)
+    by_count = sorted(Counter(ranks).items(), key=lambda item: (item[1], item[0]), reverse=True)
+    shape = [count for _, count in by_count]
+    tiebreak = [rank for rank, _ in by_count]
+    straight = _straight_high(ranks)
+    flush = len({card & 3 for card in cards}) == 1
+    if straight is not None and flush:
+        return (8, [straight])
+    if shape == [4, 1]:
+        return (7, tiebreak)
+    if shape == [3, 2]:
+        return (6, tiebreak)
+    if flush:
+        return (5, ranks)
+    if straight is not None:
+        return (4, [straight])
+    if shape == [3, 1, 1]:
+        return (3, tiebreak)
+    if shape == [2, 2, 1]:
+        return (2, tiebreak)
+    if shape == [2, 1, 1, 1]:
+        return (1, tiebreak)
+    return (0, ranks)
+
+
+def best_hand(cards):
+    return max(rank_five(five) for five in combinations(cards, 5))
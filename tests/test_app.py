@@ -0,0 +1,54 @@
+import pytest
+
+import app as flask_app
+
+PUZZLE = {'hole_cards': [48, 49], 'community_cards': [0, 17, 30],
+          'probabilities': {'pair': 50.0}}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(flask_app.puzzle_pool, 'get', lambda: dict(PUZZLE))
+    return flask_app.app.test_client()
+
+
+def test_streets_are_dealt_in_turn(client):
+    client.post('/new_hand')
+    turn = client.post('/next_street').get_json()
+    assert turn['street'] == 'Turn' and len(turn['community_cards']) == 4
+    river = client.post('/next_street').get_json()
+    assert river['street'] == 'River' and river['community_cards'][:4] == turn['community_cards']
+    assert client.post('/next_street').status_code == 400
+
+
+def test_concurrent_next_street_is_refused(client, monkeypatch):
+    client.post('/new_hand')
+    with client.session_transaction() as session:
+        puzzle = flask_app.puzzle_store.get(session['puzzle_id'])
+    calculate = flask_app.PokerQuiz.calculate_probabilities
+
+    def racing(self, hole_cards, community_cards, state=None):
+        # Another request deals the turn while this one is computing
+        monkeypatch.setattr(flask_app.PokerQuiz, 'calculate_probabilities', calculate)
+        assert client.post('/next_street').status_code == 200
+        return calculate(self, hole_cards, community_cards, state)
+
+    monkeypatch.setattr(flask_app.PokerQuiz, 'calculate_probabilities', racing)
+    response = client.post('/next_street')
+    assert response.status_code == 409
+    # The winner's turn stands, and its state matches its cards
+    assert len(puzzle['community_cards']) == 4
+    assert puzzle['state'].community_cards == puzzle['community_cards']
+
+
+@pytest.mark.parametrize('query', ['?min=30', '?max=40&min_categories=2', '?category=&min=10'])
+def test_probability_band_needs_a_category(client, query):
+    response = client.post('/new_hand' + query)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "min and max need a category"}
+
+
+def test_bad_filter_value_is_refused(client):
+    response = client.post('/new_hand?category=flush&min=lots')
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "bad filter value"}
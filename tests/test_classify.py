@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from validator import HAND_BITS, classify_cards, hands_in_mask
+from brute_force import classify
+
+
+def random_hands(size, count, seed):
+    rng = random.Random(seed)
+    return [rng.sample(range(52), size) for _ in range(count)]
+
+
+@pytest.mark.parametrize('size', [5, 6, 7])
+def test_classify_cards_matches_brute_force(size):
+    for cards in random_hands(size, 2000, seed=size):
+        made, with_hole = classify_cards(cards)
+        expected_made, expected_with_hole = classify(cards)
+        assert set(hands_in_mask(made)) == expected_made, cards
+        assert set(hands_in_mask(with_hole)) == expected_with_hole, cards
+
+
+def test_classify_cards_on_rare_hands():
+    # Royal flush on the board plus a hole card of the same suit, quads with a hole card
+    royal = [48, 1] + [32, 36, 40, 44, 5]
+    assert classify(royal) == tuple(set(hands_in_mask(mask)) for mask in classify_cards(royal))
+    assert classify_cards(royal)[1] & HAND_BITS["Royal Flush"]
+    quads = [20, 21, 22, 23, 0, 4, 9]
+    assert classify_cards(quads)[1] & HAND_BITS["Four of a Kind"]
+
+
+@pytest.mark.parametrize('cards, straight, straight_flush', [
+    ([48, 1, 6, 11, 12, 29, 46], True, False),   # A-2-3-4-5 offsuit
+    ([48, 0, 4, 8, 12, 29, 46], True, True),     # A-2-3-4-5 of spades
+    ([44, 49, 2, 7, 8, 29, 22], False, False),   # K-A-2-3-4 doesn't wrap
+    ([48, 1, 6, 11, 17, 29, 46], False, False),  # A-2-3-4-6
+])
+def test_classify_cards_on_wheels(cards, straight, straight_flush):
+    made = classify_cards(cards)[0]
+    assert bool(made & HAND_BITS["Straight"]) == straight
+    assert bool(made & HAND_BITS["Straight Flush"]) == straight_flush
+    assert set(hands_in_mask(made)) == classify(cards)[0]
+
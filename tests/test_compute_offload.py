@@ -0,0 +1,85 @@
+from concurrent.futures import Future
+
+from compute_offload import ComputeOffload
+
+HOLE, FLOP = [48, 49], [0, 17, 30]
+
+
+class FakePool:
+    """Stands in for LazyProcessPool: hands out futures the test resolves by hand"""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
+def make_offload(on_lookup=None):
+    offload = ComputeOffload(budget=0, on_lookup=on_lookup)
+    offload._pool = FakePool()
+    return offload
+
+
+def test_late_exact_result_follows_the_estimate():
+    offload = make_offload()
+    landed = []
+    probabilities, approximate = offload.probabilities(HOLE, FLOP, on_exact=landed.append)
+    assert approximate
+    assert set(probabilities) == {'pair', 'two pair', 'three of a kind', 'straight', 'flush', 'full house',
+                                  'four of a kind', 'straight flush', 'royal flush'}
+    assert offload.stats()['timeouts'] == 1 and landed == []
+
+    exact = {'pair': 42.0}
+    offload._pool.futures[0].set_result((exact, 'hit'))
+    assert landed == [exact]
+    assert offload.stats()['late_completions'] == 1
+
+    # The late result is cached, so the same hand is now answered exactly
+    assert offload.probabilities(list(reversed(HOLE)), FLOP) == (exact, False)
+    assert offload.stats()['cache_hits'] == 1
+
+
+def test_result_within_budget_is_exact():
+    offload = ComputeOffload(budget=1)
+    offload._pool = FakePool()
+    offload._pool.submit = lambda fn, *args: _done(({'pair': 1.0}, 'miss'))
+    assert offload.probabilities(HOLE, FLOP) == ({'pair': 1.0}, False)
+    assert offload.stats()['within_budget'] == 1
+
+
+def test_cancelled_late_result_is_counted_and_dropped():
+    offload = make_offload()
+    landed = []
+    offload.probabilities(HOLE, FLOP, on_exact=landed.append)
+    offload._pool.futures[0].cancel()
+    assert landed == []
+    assert offload.stats()['errors'] == 1 and offload.stats()['cached'] == 0
+
+
+def test_failed_late_result_is_counted():
+    offload = make_offload()
+    offload.probabilities(HOLE, FLOP, on_exact=lambda exact: None)
+    offload._pool.futures[0].set_exception(RuntimeError("worker died"))
+    assert offload.stats()['errors'] == 1 and offload.stats()['late_completions'] == 0
+
+
+def test_flop_lookups_are_reported_in_this_process():
+    lookups = []
+    offload = make_offload(on_lookup=lookups.append)
+    offload.probabilities(HOLE, FLOP)
+    offload._pool.futures[0].set_result(({'pair': 42.0}, 'hit'))
+    offload.budget = 1
+    offload._pool.submit = lambda fn, *args: _done(({'pair': 1.0}, 'miss'))
+    offload.probabilities(HOLE, [1, 2, 3])
+    offload._pool.submit = lambda fn, *args: _done(({'pair': 1.0}, None))
+    offload.probabilities(HOLE, [1, 2, 3, 4])
+    assert lookups == ['hit', 'miss']
+
+
+def _done(result):
+    future = Future()
+    future.set_result(result)
+    return future
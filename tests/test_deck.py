@@ -0,0 +1,70 @@
+import random
+from collections import Counter
+
+import pytest
+
+from cards import ALL_CARDS, Deck, to_mask
+
+
+def check(deck, dealt, dead):
+    """The bookkeeping agrees with what the test has dealt and killed"""
+    assert all(deck.pos[card] == idx for idx, card in enumerate(deck.cards))
+    undealt = [card for card in ALL_CARDS if card not in dealt and card not in dead]
+    assert deck.remaining() == undealt
+    assert len(deck) == len(undealt)
+    assert [card for card in ALL_CARDS if card in deck] == undealt
+    assert sorted(deck) == undealt
+
+
+def test_bookkeeping_across_deal_remove_and_reset():
+    rng = random.Random(1)
+    deck = Deck(rng=rng)
+    dealt, dead = set(), set()
+    for step in range(2000):
+        action = rng.random()
+        if action < 0.5 and len(deck):
+            cards = deck.deal(rng.randint(1, min(5, len(deck))))
+            assert not set(cards) & (dealt | dead)
+            dealt.update(cards)
+        elif action < 0.75:
+            cards = set(rng.sample(ALL_CARDS, rng.randint(1, 3)))
+            deck.remove(to_mask(cards))
+            dead |= cards
+            dealt -= cards
+        elif action < 0.9:
+            deck.reset()
+            dealt = set()
+        else:
+            dead = set(rng.sample(ALL_CARDS, rng.randint(0, 10)))
+            deck.reset(to_mask(dead))
+            dealt = set()
+        check(deck, dealt, dead)
+
+
+def test_dead_cards_are_never_dealt():
+    dead = {0, 13, 26, 39, 51}
+    deck = Deck(to_mask(dead), random.Random(2))
+    for _ in range(200):
+        deck.reset()
+        cards = deck.deal(47)
+        assert len(set(cards)) == 47 and not set(cards) & dead
+    with pytest.raises(ValueError):
+        deck.deal(1)
+
+
+def test_deals_stay_uniform_after_reset_with_dead_cards():
+    rng = random.Random(3)
+    deck = Deck(rng=rng)
+    deck.deal(10)
+    dead = set(range(0, 52, 4))
+    deck.reset(to_mask(dead))
+    draws = 39000
+    counts = Counter()
+    for _ in range(draws // 3):
+        deck.reset()
+        counts.update(deck.deal(3))
+    live = [card for card in ALL_CARDS if card not in dead]
+    assert set(counts) == set(live)
+    # Chi-squared over 39 cards (38 degrees of freedom); 70 is far past the 99.9th percentile
+    expected = draws / len(live)
+    assert sum((counts[card] - expected) ** 2 / expected for card in live) < 70
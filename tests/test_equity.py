@@ -0,0 +1,55 @@
+import pytest
+
+from cards import cards_to_ints
+from equity import equity, parse_range
+from brute_force import best_hand
+
+AA = cards_to_ints([["A", "♠"], ["A", "♥"]])
+
+
+def test_aces_against_kings_preflop():
+    # Exact over all 1,712,304 boards: AA is the usual ~4:1 favourite, a little
+    # under the ~82% average over suits since these kings share no suit with it
+    result = equity(AA, "KdKc", exact_limit=2000000)
+    assert result['exact'] and result['trials'] == 1712304
+    assert result['equity'] == pytest.approx(81.26, abs=0.01)
+    assert result['win'] + result['tie'] + result['loss'] == pytest.approx(100)
+
+
+def test_sampled_equity_is_close_to_exact():
+    result = equity(AA, "KdKc", num_samples=200000, exact_limit=0, seed=1)
+    assert not result['exact']
+    assert result['equity'] == pytest.approx(81.26, abs=0.5)
+
+
+def test_same_seed_and_workers_give_the_same_result():
+    # In-process with one stream, in a pool with several
+    for workers in (1, 3):
+        first = equity(AA, "KK, QQ", num_samples=30000, exact_limit=0, seed=7, workers=workers)
+        again = equity(AA, "KK, QQ", num_samples=30000, exact_limit=0, seed=7, workers=workers)
+        assert first == again and first['trials'] == 30000
+
+
+def test_turn_equity_matches_brute_force():
+    hero = cards_to_ints([["A", "♠"], ["K", "♠"]])
+    board = cards_to_ints([["Q", "♠"], ["7", "♦"], ["2", "♠"], ["J", "♥"]])
+    combos = [combo for combo in parse_range("QQ+, AJs, 77") if not set(combo) & set(hero + board)]
+    wins = ties = trials = 0
+    for combo in combos:
+        for river in range(52):
+            if river in hero + board or river in combo:
+                continue
+            ours, theirs = best_hand(hero + board + [river]), best_hand(list(combo) + board + [river])
+            wins += ours > theirs
+            ties += ours == theirs
+            trials += 1
+    result = equity(hero, "QQ+, AJs, 77", board)
+    assert result['exact'] and result['trials'] == trials
+    assert result['win'] == pytest.approx(wins / trials * 100)
+    assert result['tie'] == pytest.approx(ties / trials * 100)
+
+
+def test_ranges_that_cannot_be_dealt_together_are_rejected():
+    hero = cards_to_ints([["2", "♠"], ["3", "♥"]])
+    with pytest.raises(ValueError):
+        equity(hero, ["AsKd", "AsKd"], num_samples=1000, seed=1)
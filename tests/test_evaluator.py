@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from evaluator import CATEGORIES, evaluate
+from validator import HandEvaluator
+from brute_force import best_hand
+
+
+def test_identify_best_hand_matches_brute_force():
+    rng = random.Random(3)
+    evaluator = HandEvaluator()
+    for _ in range(1000):
+        cards = rng.sample(range(52), 7)
+        category, ranks = best_hand(cards)
+        expected = CATEGORIES[category]
+        if expected == "Straight Flush" and ranks == [12]:
+            expected = "Royal Flush"
+        assert evaluator.identify_best_hand(cards[:2], cards[2:]) == expected, cards
+
+
+def test_compare_hands_matches_brute_force():
+    rng = random.Random(5)
+    evaluator = HandEvaluator()
+    for _ in range(1000):
+        dealt = rng.sample(range(52), 9)
+        hero, villain, board = dealt[:2], dealt[2:4], dealt[4:]
+        a, b = best_hand(hero + board), best_hand(villain + board)
+        assert evaluator.compare_hands(hero, villain, board) == (a > b) - (a < b), dealt
+
+
+@pytest.mark.parametrize('size', [5, 6, 7])
+def test_classify_many_matches_identify_best_hand(size):
+    rng = random.Random(size)
+    evaluator = HandEvaluator()
+    hands = [rng.sample(range(52), size) for _ in range(1000)]
+    codes = evaluator.classify_many(hands)
+    same_codes, strengths = evaluator.classify_many(hands, strengths=True)
+    assert same_codes.tolist() == codes.tolist()
+    for cards, code, strength in zip(hands, codes.tolist(), strengths.tolist()):
+        assert CATEGORIES[code] == evaluator.identify_best_hand(cards[:2], cards[2:]), cards
+        assert strength == evaluate(cards), cards
+
+
+def test_classify_many_rejects_bad_shapes():
+    with pytest.raises(ValueError):
+        HandEvaluator().classify_many([[0, 1, 2, 3]])
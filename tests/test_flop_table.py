@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+import flop_table
+from flop_table import HOLE_CLASS_INDEX, SUIT_PERMUTATIONS, FlopTable, _relabel, build_table, canonical_form
+from validator import HAND_TYPES, probabilityValidator
+
+
+def test_canonical_form_is_invariant_under_suit_relabelling():
+    rng = random.Random(7)
+    for _ in range(300):
+        dealt = rng.sample(range(52), 5)
+        hole, flop = dealt[:2], dealt[2:]
+        form = canonical_form(hole, flop)
+        assert form[0] in HOLE_CLASS_INDEX
+        for perm in SUIT_PERMUTATIONS:
+            assert canonical_form(_relabel(hole, perm), _relabel(flop, perm)) == form
+
+
+@pytest.fixture(scope='module')
+def one_flop_table(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('flop') / 'flop_table.bin')
+    build_table(path, workers=1, limit=1)
+    table = FlopTable(path)
+    yield table, flop_table.canonical_flops()[0]
+    table.close()
+
+
+def test_built_flop_matches_enumeration(one_flop_table):
+    table, flop = one_flop_table
+    validator = probabilityValidator()
+    rng = random.Random(3)
+    deck = [card for card in range(52) if card not in flop]
+    for _ in range(20):
+        hole = rng.sample(deck, 2)
+        # Any relabelling of the flop finds the same record
+        perm = rng.choice(SUIT_PERMUTATIONS)
+        runouts = validator.enumerate_runouts(hole, list(flop))
+        expected = {hand: round(runouts['counts'][hand] * 10000 / runouts['total']) / 100 for hand in HAND_TYPES}
+        assert table.lookup(_relabel(hole, perm), _relabel(flop, perm)) == expected
+
+
+def test_unbuilt_slots_are_missing(one_flop_table):
+    table, flop = one_flop_table
+    assert table.lookup([48, 49], [12, 21, 34]) is None
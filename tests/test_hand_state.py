@@ -0,0 +1,29 @@
+import random
+
+from validator import HandState, classify_cards, probabilityValidator
+
+
+def test_hand_state_matches_classify_cards():
+    rng = random.Random(11)
+    for _ in range(500):
+        cards = rng.sample(range(52), 7)
+        state = HandState(cards[:2], cards[2:5])
+        for card in cards[5:]:
+            state = state.plus(card)
+        assert state.classify() == classify_cards(cards)
+
+
+def test_plus_leaves_the_state_unchanged():
+    state = HandState([48, 49], [44, 40, 2])
+    before = state.classify(), state.dealt, list(state.community_cards)
+    turn = state.plus(36)
+    assert (state.classify(), state.dealt, list(state.community_cards)) == before
+    assert turn.dealt == state.dealt | 1 << 36
+
+
+def test_enumerate_runouts_reuses_a_carried_state():
+    validator = probabilityValidator()
+    hole, flop = [48, 49], [44, 40, 2]
+    state = HandState(hole, flop).plus(36)
+    assert validator.enumerate_runouts(hole, flop + [36], state) == \
+        validator.enumerate_runouts(hole, flop + [36])
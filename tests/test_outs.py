@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+from cards import cards_to_ints, mask_to_ints
+from validator import HAND_TYPES, probabilityValidator
+from brute_force import classify
+
+
+@pytest.mark.parametrize('num_community', [3, 4])
+def test_outs_match_brute_force(num_community):
+    validator = probabilityValidator()
+    rng = random.Random(10 + num_community)
+    for _ in range(5):
+        dealt = rng.sample(range(52), 2 + num_community)
+        hole, community = dealt[:2], dealt[2:]
+        runouts = validator.enumerate_runouts(hole, community, collect_outs=True)
+        already = classify(hole + community)[1]
+        deck = [card for card in range(52) if card not in hole + community]
+        for hand in HAND_TYPES:
+            outs = {card for card in deck if hand in classify(hole + community + [card])[1] - already}
+            assert runouts['out_masks'][hand] == sum(1 << card for card in outs)
+            assert runouts['outs'][hand] == len(outs)
+            if num_community == 3:
+                # Runner-runner: made by the river but by neither card alone
+                pairs = [(a, b) for i, a in enumerate(deck) for b in deck[i + 1:]
+                         if hand in classify(hole + community + [a, b])[1]
+                         and a not in outs and b not in outs and hand not in already]
+                assert sorted(runouts['two_card_combos'][hand]) == sorted(pairs)
+
+
+def test_flush_draw_outs_are_the_other_spades():
+    hole = cards_to_ints([["A", "♠"], ["K", "♠"]])
+    flop = cards_to_ints([["Q", "♠"], ["7", "♦"], ["2", "♠"]])
+    outs = probabilityValidator()._num_outs(hole, flop, "Flush")
+    spades = [card for card in range(52) if card & 3 == 0 and card not in hole + flop]
+    assert outs['outs'] == 9
+    assert mask_to_ints(outs['out_mask']) == spades
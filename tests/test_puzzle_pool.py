@@ -0,0 +1,27 @@
+import time
+
+from puzzle_pool import PuzzlePool
+
+
+def test_worker_survives_generate_errors():
+    calls = []
+
+    def generate():
+        calls.append(None)
+        if len(calls) <= 3:
+            raise OSError("unreadable table")
+        return {'n': len(calls)}
+
+    pool = PuzzlePool(target_depth=2, low_water=1, generate=generate)
+    pool.backoff = 0.001
+    pool.start()
+    try:
+        deadline = time.monotonic() + 5
+        while pool.stats()['depth'] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stats = pool.stats()
+        assert stats['errors'] == 3
+        assert stats['depth'] == 2
+        assert pool.get() == {'n': 4}
+    finally:
+        pool.stop()
@@ -0,0 +1,53 @@
+import pytest
+
+import puzzle_store
+from puzzle_store import PuzzleStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(puzzle_store.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_ttl_since_last_use(clock):
+    store = PuzzleStore(ttl=10)
+    puzzle_id = store.put({'n': 1})
+    clock[0] += 9
+    assert store.get(puzzle_id) == {'n': 1}
+    # get() refreshed it, so it lives another ttl from here
+    clock[0] += 9
+    assert store.get(puzzle_id) == {'n': 1}
+    clock[0] += 11
+    assert store.get(puzzle_id) is None
+    assert len(store) == 0
+
+
+def test_put_evicts_expired_entries(clock):
+    store = PuzzleStore(ttl=10)
+    store.put({'n': 1})
+    clock[0] += 11
+    store.put({'n': 2})
+    assert len(store) == 1
+
+
+def test_least_recently_used_is_dropped_past_max_entries(clock):
+    store = PuzzleStore(ttl=100, max_entries=2)
+    first, second = store.put({'n': 1}), store.put({'n': 2})
+    store.get(first)
+    third = store.put({'n': 3})
+    assert store.get(second) is None
+    assert store.get(first) == {'n': 1} and store.get(third) == {'n': 3}
+
+
+def test_update_with_a_failing_check_leaves_the_puzzle_alone(clock):
+    store = PuzzleStore()
+    puzzle_id = store.put({'community_cards': [1, 2, 3, 4], 'probabilities': 'turn'})
+    assert not store.update(puzzle_id, when=lambda stored: len(stored['community_cards']) == 3,
+                            probabilities='flop')
+    assert store.get(puzzle_id)['probabilities'] == 'turn'
+    assert store.update(puzzle_id, when=lambda stored: len(stored['community_cards']) == 4,
+                        probabilities='river')
+    assert store.get(puzzle_id)['probabilities'] == 'river'
+    assert not store.update('unknown', probabilities='x')
@@ -0,0 +1,32 @@
+import random
+
+import pytest
+
+from validator import HAND_TYPES, probabilityValidator
+from brute_force import runout_counts
+
+
+def deals(num_community, count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        dealt = rng.sample(range(52), 2 + num_community)
+        yield dealt[:2], dealt[2:]
+
+
+@pytest.mark.parametrize('num_community, count', [(3, 3), (4, 10), (5, 10)])
+def test_enumerate_runouts_counts_match_brute_force(num_community, count):
+    validator = probabilityValidator()
+    for hole, community in deals(num_community, count, seed=num_community):
+        runouts = validator.enumerate_runouts(hole, community)
+        counts, total = runout_counts(hole, community)
+        assert runouts['total'] == total
+        assert runouts['counts'] == counts, (hole, community)
+
+
+def test_calculate_probability_is_counts_over_total():
+    validator = probabilityValidator()
+    hole, flop = [0, 5], [10, 20, 30]
+    counts, total = runout_counts(hole, flop)
+    result = validator.calculate_probability(hole, flop)
+    for hand in HAND_TYPES:
+        assert result[hand]['probability'] == round(counts[hand] / total * 100, 2)
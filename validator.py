@@ -1,8 +1,6 @@
 import random
 from collections import defaultdict
-import pickle
-import tqdm
-import json
+from cards import RANKS, SUITS, ALL_CARDS, Deck, cards_to_ints, to_mask
 def binom(n, k):
     """Calculate n choose k (binomial coefficient)
     Args:
@@ -23,6 +21,229 @@ def binom(n, k):
         result //= (i + 1)
     return result
 
+
+HAND_TYPES = ["Pair", "Two Pair", "Three of a Kind", "Straight",
+              "Flush", "Full House", "Four of a Kind",
+              "Straight Flush", "Royal Flush"]
+
+# Bit i of a classification mask stands for HAND_TYPES[i]
+HAND_BITS = {hand: 1 << i for i, hand in enumerate(HAND_TYPES)}
+PAIR, TWO_PAIR, THREE_OF_A_KIND, STRAIGHT, FLUSH, FULL_HOUSE, FOUR_OF_A_KIND, \
+    STRAIGHT_FLUSH, ROYAL_FLUSH = (HAND_BITS[hand] for hand in HAND_TYPES)
+
+# 13-bit rank masks: bit 0 is a deuce, bit 12 an ace
+ROYAL_MASK = 0b1111100000000
+
+
+def _straight_cover(rank_mask):
+    """Return the 13-bit mask of ranks that belong to at least one straight in 'rank_mask'"""
+    # Shift up one place and copy the ace into bit 0 so the wheel is an ordinary run
+    ext = (rank_mask << 1) | (rank_mask >> 12)
+    starts = ext & (ext >> 1) & (ext >> 2) & (ext >> 3) & (ext >> 4)
+    covered = starts | (starts << 1) | (starts << 2) | (starts << 3) | (starts << 4)
+    return ((covered >> 1) | (covered << 12)) & 0x1FFF
+
+
+# Precomputed for every 13-bit rank mask; 0 means no straight
+STRAIGHT_COVER = [_straight_cover(mask) for mask in range(1 << 13)]
+
+
+def classify_cards(cards, num_hole=2):
+    """Classify every hand type made by 'cards' in one pass.
+
+    The first 'num_hole' cards are the hole cards.
+    Returns:
+        tuple: (made, made_with_hole) bitmasks over HAND_TYPES, the second
+        counting only hands that use at least one hole card
+    """
+    rank_mask = paired = trips = quads = 0
+    suit_masks = [0, 0, 0, 0]
+    for card in cards:
+        bit = 1 << (card >> 2)
+        if bit & trips:
+            quads |= bit
+        elif bit & paired:
+            trips |= bit
+        elif bit & rank_mask:
+            paired |= bit
+        rank_mask |= bit
+        suit_masks[card & 3] |= bit
+
+    hole_ranks = 0
+    hole_suits = [0, 0, 0, 0]
+    for card in cards[:num_hole]:
+        hole_ranks |= 1 << (card >> 2)
+        hole_suits[card & 3] |= 1 << (card >> 2)
+
+    return classify_masks(rank_mask, paired, trips, quads, suit_masks, hole_ranks, hole_suits)
+
+
+def classify_masks(rank_mask, paired, trips, quads, suit_masks, hole_ranks, hole_suits):
+    """The hand types made by cards summarised as 13-bit rank masks.
+
+    'paired', 'trips' and 'quads' hold the ranks seen at least 2, 3 and 4
+    times, 'suit_masks' the ranks held in each suit, and the hole_ masks the
+    same for the hole cards alone (see classify_cards and HandState).
+    Returns:
+        tuple: (made, made_with_hole) bitmasks over HAND_TYPES
+    """
+    made = with_hole = 0
+    if paired:
+        made |= PAIR
+        if paired & hole_ranks:
+            with_hole |= PAIR
+        if paired & (paired - 1):
+            made |= TWO_PAIR
+            if paired & hole_ranks:
+                with_hole |= TWO_PAIR
+            if trips:
+                # A full house only needs a hole card in either the trips or the pair
+                made |= FULL_HOUSE
+                if paired & hole_ranks:
+                    with_hole |= FULL_HOUSE
+        if trips:
+            made |= THREE_OF_A_KIND
+            if trips & hole_ranks:
+                with_hole |= THREE_OF_A_KIND
+            if quads:
+                made |= FOUR_OF_A_KIND
+                if quads & hole_ranks:
+                    with_hole |= FOUR_OF_A_KIND
+
+    cover = STRAIGHT_COVER[rank_mask]
+    if cover:
+        made |= STRAIGHT
+        if cover & hole_ranks:
+            with_hole |= STRAIGHT
+
+    for suit in range(4):
+        suited = suit_masks[suit]
+        if suited.bit_count() < 5:
+            continue
+        # Seven cards can only hold one flush suit
+        made |= FLUSH
+        hole_suited = hole_suits[suit]
+        if hole_suited:
+            with_hole |= FLUSH
+        cover = STRAIGHT_COVER[suited]
+        if cover:
+            made |= STRAIGHT_FLUSH
+            if cover & hole_suited:
+                with_hole |= STRAIGHT_FLUSH
+            if suited & ROYAL_MASK == ROYAL_MASK:
+                made |= ROYAL_FLUSH
+                if hole_suited & ROYAL_MASK:
+                    with_hole |= ROYAL_FLUSH
+        break
+    return made, with_hole
+
+
+def hands_in_mask(mask):
+    """List the hand types whose bits are set in a classification mask"""
+    return [hand for hand in HAND_TYPES if mask & HAND_BITS[hand]]
+
+
+def count_by_hand(mask_counts):
+    """Turn {classification mask: frequency} into {hand type: frequency}"""
+    counts = {hand: 0 for hand in HAND_TYPES}
+    for mask, freq in mask_counts.items():
+        for hand in hands_in_mask(mask):
+            counts[hand] += freq
+    return counts
+
+class HandState:
+    """
+    Rank and suit masks of a hole + community hand, updated one card at a time.
+
+    add() folds a card in with a handful of bit operations, and plus() gives a
+    copy with one more card, so each street only pays for the cards it adds:
+    the turn reuses the flop's state and just tries each of the 46 rivers.
+    """
+    __slots__ = ('hole_cards', 'community_cards', 'dealt', 'rank_mask', 'paired', 'trips',
+                 'quads', 'suit_masks', 'hole_ranks', 'hole_suits')
+
+    def __init__(self, hole_cards, community_cards=()):
+        self.hole_cards = list(hole_cards)
+        self.community_cards = []
+        # 52-bit mask of every card in the hand
+        self.dealt = 0
+        self.rank_mask = self.paired = self.trips = self.quads = 0
+        self.suit_masks = [0, 0, 0, 0]
+        self.hole_ranks = 0
+        self.hole_suits = [0, 0, 0, 0]
+        for card in self.hole_cards:
+            self._fold(card)
+            self.hole_ranks |= 1 << (card >> 2)
+            self.hole_suits[card & 3] |= 1 << (card >> 2)
+        for card in community_cards:
+            self.add(card)
+
+    def _fold(self, card):
+        bit = 1 << (card >> 2)
+        if bit & self.trips:
+            self.quads |= bit
+        elif bit & self.paired:
+            self.trips |= bit
+        elif bit & self.rank_mask:
+            self.paired |= bit
+        self.rank_mask |= bit
+        self.suit_masks[card & 3] |= bit
+        self.dealt |= 1 << card
+
+    def add(self, card):
+        """Add a community card in place and return the state"""
+        if self.dealt >> card & 1:
+            raise ValueError(f"card {card} is already in the hand")
+        self._fold(card)
+        self.community_cards.append(card)
+        return self
+
+    def plus(self, card):
+        """A new state with one more community card; this one is left as it is"""
+        child = HandState.__new__(HandState)
+        child.hole_cards = self.hole_cards
+        child.community_cards = self.community_cards + [card]
+        child.dealt = self.dealt
+        child.rank_mask, child.paired, child.trips, child.quads = \
+            self.rank_mask, self.paired, self.trips, self.quads
+        child.suit_masks = self.suit_masks[:]
+        # Hole masks never change after __init__, so they can be shared
+        child.hole_ranks, child.hole_suits = self.hole_ranks, self.hole_suits
+        child._fold(card)
+        return child
+
+    @property
+    def cards(self):
+        return self.hole_cards + self.community_cards
+
+    def remaining(self):
+        """The cards not in the hand, in ascending order"""
+        return [card for card in ALL_CARDS if not self.dealt >> card & 1]
+
+    def classify(self):
+        """(made, made_with_hole) bitmasks over HAND_TYPES, as classify_cards(self.cards)"""
+        return classify_masks(self.rank_mask, self.paired, self.trips, self.quads,
+                              self.suit_masks, self.hole_ranks, self.hole_suits)
+
+
+def masks_by_hand(mask_cards):
+    """Turn {classification mask: 52-bit card mask} into {hand type: OR of the card masks}"""
+    cards = {hand: 0 for hand in HAND_TYPES}
+    for mask, card_mask in mask_cards.items():
+        for hand in hands_in_mask(mask):
+            cards[hand] |= card_mask
+    return cards
+
+
+def pairs_by_hand(mask_pairs):
+    """Turn {classification mask: [(card, card), ...]} into {hand type: all those pairs}"""
+    pairs = {hand: [] for hand in HAND_TYPES}
+    for mask, card_pairs in mask_pairs.items():
+        for hand in hands_in_mask(mask):
+            pairs[hand].extend(card_pairs)
+    return pairs
+
+
 # def print_pretty_dict(data):
 #     for hand, values in data.items():
 #         print(f"{hand}:")
@@ -33,260 +254,186 @@ def binom(n, k):
 
 class probabilityValidator:
     def __init__(self, num_simulations=10000):
-        self.ranks = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        self.suits = ['♠', '♥', '♦', '♣']
-        self.deck = [[rank, suit] for rank in self.ranks for suit in self.suits]
-        self.rank_values = {rank: idx for idx, rank in enumerate(self.ranks)}
+        self.ranks = RANKS
+        self.suits = SUITS
+        # Cards are ints 0-51 (see cards.py)
+        self.deck = Deck()
         self.num_simulations = num_simulations
-    def simulate_post_flop(self, hole_cards, community_cards=None, require_hole_cards=True):
+
+    def simulate_post_flop(self, hole_cards, community_cards=None, require_hole_cards=True,
+                           vectorized=False, seed=None):
         """
         Run Monte Carlo simulation and return probabilities for all hand types,
         requiring hole cards usage if 'require_hole_cards' is True.
+
+        With 'vectorized' every board is sampled and classified as a NumPy
+        array (see vectorized.py). 'seed' seeds the random generator either way.
         """
+        successes = defaultdict(int)
+
+        # PRE-CHECK: any hand already formed by the existing board + hole is locked at 100%
+        known_cards = hole_cards + (community_cards if community_cards else [])
+        locked = classify_cards(known_cards)[1]
 
-        hand_types = ["Pair", "Two Pair", "Three of a Kind", "Straight",
-                      "Flush", "Full House", "Four of a Kind", 
-                      "Straight Flush", "Royal Flush"]
-        successes = {hand: 0 for hand in hand_types}
-
-        # PRE-CHECK: if any hand is already formed by the existing board + hole,
-        # set it to 100% immediately by marking its success as self.num_simulations.
-        all_seven_cards = hole_cards + (community_cards if community_cards else [])
-        for hand_type in hand_types:
-            # if the 7 cards already hold this hand (ignore 'require_hole_cards' if you prefer a 100% lock)
-            if self._has_hand(all_seven_cards, hand_type, require_hole_cards=True) is True:
-                successes[hand_type] = self.num_simulations
-
-        for _ in range(self.num_simulations):
-            # Build a deck minus hole & community
-            deck = [[rank, suit] for rank, suit in self.deck]
-            for card in hole_cards:
-                deck.remove(card)
-            if community_cards:
-                for card in community_cards:
-                    if card in deck:
-                        deck.remove(card)
-
-            # Deal remaining community if needed
+        if vectorized:
+            import numpy as np
+            from vectorized import simulate_counts
+            rng = np.random.default_rng(seed)
+            successes.update(simulate_counts(known_cards, self.num_simulations, rng, require_hole_cards))
+        else:
+            # Hole & community are dead cards; each simulation just puts the board back
+            deck = Deck(to_mask(known_cards), random.Random(seed) if seed is not None else None)
             cards_dealt = 5 - len(community_cards) if community_cards else 5
-            board = random.sample(deck, cards_dealt)
-            full_cards = hole_cards + (community_cards if community_cards else []) + board
 
-            for hand_type in hand_types:
-                # If we haven't already locked it to 100% from the pre-check:
-                if successes[hand_type] < self.num_simulations:
-                    if self._has_hand(full_cards, hand_type, require_hole_cards=require_hole_cards):
-                        successes[hand_type] += 1
+            for _ in range(self.num_simulations):
+                # Deal remaining community if needed
+                deck.reset()
+                board = deck.deal(cards_dealt)
+                made, with_hole = classify_cards(known_cards + board)
+                successes[with_hole if require_hole_cards else made] += 1
 
         # Convert to percentages
+        counts = count_by_hand(successes)
         probabilities = {
-            hand: (count / self.num_simulations) * 100
-            for hand, count in successes.items()
+            hand: 100.0 if locked & HAND_BITS[hand] else (count / self.num_simulations) * 100
+            for hand, count in counts.items()
         }
         return probabilities
 
+    def simulate_parallel(self, hole_cards, community_cards=None, tolerance=0.25, workers=None,
+                          seed=None, require_hole_cards=True):
+        """
+        Multi-process, reproducibly seeded Monte Carlo that stops once every
+        hand type's 95% confidence half-width is within 'tolerance' percentage
+        points (see montecarlo.py). At most self.num_simulations are run.
+        """
+        from montecarlo import simulate_parallel
+        return simulate_parallel(hole_cards, community_cards, tolerance=tolerance, workers=workers,
+                                 seed=seed, max_simulations=self.num_simulations,
+                                 require_hole_cards=require_hole_cards)
+
+    def simulate_stratified(self, hole_cards, community_cards=None, seed=None, require_hole_cards=True):
+        """
+        Monte Carlo for rare hands: stratified over the next card and importance
+        sampled towards the cards rare hands need (see montecarlo.py). Uses
+        self.num_simulations samples, but quads, straight flushes and royal
+        flushes come out about as precise as with 10-100x as many uniform ones.
+        Returns probabilities plus per-hand 'std_errors' and 'relative_errors'.
+        """
+        from montecarlo import simulate_stratified
+        return simulate_stratified(hole_cards, community_cards, num_simulations=self.num_simulations,
+                                   seed=seed, require_hole_cards=require_hole_cards)
+
     def _has_hand(self, cards, target_hand, require_hole_cards=True):
-        """Check if the given cards make the target hand using at least one hole card"""
-        # Separate hole cards (first 2) from other cards
-        hole_cards = cards[:2]
-        all_cards = cards
-        
-        ranks = [card[0] for card in all_cards]
-        suits = [card[1] for card in all_cards]
-        rank_counts = defaultdict(int)
-        suit_counts = defaultdict(int)
-        
-        # Count ranks and suits
-        for rank in ranks:
-            rank_counts[rank] += 1
-        for suit in suits:
-            suit_counts[suit] += 1
-        
-        # Count hole card ranks and suits separately
-        hole_ranks = [card[0] for card in hole_cards]
-        hole_suits = [card[1] for card in hole_cards]
-        
-        # Convert face cards to numbers for straight checking
-        numeric_ranks = []
-        for rank in ranks:
-            if rank == 'A':
-                numeric_ranks.append(14)  # Ace high
-                numeric_ranks.append(1)   # Ace low for A-5 straight
-            elif rank == 'K':
-                numeric_ranks.append(13)
-            elif rank == 'Q':
-                numeric_ranks.append(12)
-            elif rank == 'J':
-                numeric_ranks.append(11)
-            else:
-                numeric_ranks.append(int(rank))
-        
-        numeric_ranks = sorted(list(set(numeric_ranks)))  # Remove duplicates and sort
-        
-        if target_hand == "Pair":
-            pairs_exist = any(count >= 2 for count in rank_counts.values())
-            uses_hole_card = any(rank_counts[rank] >= 2 for rank in hole_ranks)
-            return pairs_exist and (not require_hole_cards or uses_hole_card)
-        
-        elif target_hand == "Two Pair":
-            total_pairs = sum(1 for count in rank_counts.values() if count >= 2)
-            uses_hole_card = any(rank_counts[rank] >= 2 for rank in hole_ranks)
-            return total_pairs >= 2 and (not require_hole_cards or uses_hole_card)
-        
-        elif target_hand == "Three of a Kind":
-            three_exists = any(count >= 3 for count in rank_counts.values())
-            uses_hole_card = any(rank_counts[rank] >= 3 for rank in hole_ranks)
-            return three_exists and (not require_hole_cards or uses_hole_card)
-        
-        elif target_hand == "Straight":
-            has_straight = False
-            straight_cards = []
-            for i in range(len(numeric_ranks) - 4):
-                if numeric_ranks[i + 4] - numeric_ranks[i] == 4:
-                    straight_cards = numeric_ranks[i:i + 5]
-                    has_straight = True
-                    break
-            
-            if not has_straight:
-                return False
-            
-            numeric_hole_ranks = []
-            for rank in hole_ranks:
-                if rank == 'A':
-                    numeric_hole_ranks.extend([1, 14])
-                elif rank == 'K':
-                    numeric_hole_ranks.append(13)
-                elif rank == 'Q':
-                    numeric_hole_ranks.append(12)
-                elif rank == 'J':
-                    numeric_hole_ranks.append(11)
-                else:
-                    numeric_hole_ranks.append(int(rank))
-            
-            return any(rank in straight_cards for rank in numeric_hole_ranks) if require_hole_cards else True
-        
-        elif target_hand == "Flush":
-            for suit in set(suits):
-                if suit_counts[suit] >= 5:
-                    hole_cards_in_flush = sum(1 for card in hole_cards if card[1] == suit)
-                    return hole_cards_in_flush > 0 if require_hole_cards else True
-            return False
-        
-        elif target_hand == "Full House":
-            three_of_a_kind_rank = None
-            for rank in hole_ranks:
-                if rank_counts[rank] >= 3:
-                    three_of_a_kind_rank = rank
-                    break
-            
-            if not three_of_a_kind_rank:
-                return False
-            
-            for rank, count in rank_counts.items():
-                if rank != three_of_a_kind_rank and count >= 2:
-                    return True
-            return False
-        
-        elif target_hand == "Four of a Kind":
-            for rank, count in rank_counts.items():
-                if count >= 4 and rank in hole_ranks:
-                    return True
-            return False
-        
-        return False
-
-
-   
+        """Check if the given cards make the target hand (using at least one hole card)"""
+        made, with_hole = classify_cards(cards)
+        return bool((with_hole if require_hole_cards else made) & HAND_BITS.get(target_hand, 0))
 
     def _num_outs(self, hole_cards, community_cards, target_hand):
-        if target_hand == "Two Pair":
-            verbose = False
-        else:
-            verbose = False
-        deck = [[rank, suit] for rank in self.ranks for suit in self.suits]
-        for card in hole_cards + community_cards:
-            if card in deck:
-                deck.remove(card)
-        outs = 0
-        if len(community_cards) == 4:
-            # Single card outs
-            for potential_card in deck:
-                all_cards = hole_cards + community_cards + [potential_card]
-                if self._has_hand(all_cards, target_hand):
-                    outs += 1
+        """Single-card and runner-runner outs (counts and the cards themselves) for one hand type"""
+        runouts = self.enumerate_runouts(hole_cards, community_cards, collect_outs=True)
+        return {'outs': runouts['outs'][target_hand],
+                'two_card_outs': runouts['two_card_outs'][target_hand],
+                'out_mask': runouts['out_masks'][target_hand],
+                'two_card_combos': runouts['two_card_combos'][target_hand],
+                'two_card_total': runouts['total'] if len(community_cards) == 3 else 0}
+
+    def enumerate_runouts(self, hole_cards, community_cards, state=None, collect_outs=False):
+        """Exactly count, for every hand type, the runouts that make it by the river.
+
+        Each unordered runout (1,081 on the flop, 46 on the turn) is classified
+        once, for all hand types at the same time. Runouts are built on a
+        HandState, so a 'state' already holding these cards (e.g. carried over
+        from the previous street) is reused instead of rebuilt.
+        Returns:
+            dict: 'total' runouts, per-hand 'counts', single-card 'outs' (cards that
+            make the hand on the next street) and 'two_card_outs' (runouts where
+            neither card alone is an out). 'out_masks' gives the outs themselves
+            as 52-bit card masks, per hand. With 'collect_outs' there is also
+            'two_card_combos', the runner-runner (card, card) pairs per hand;
+            collecting them costs a list append per runner-runner runout, so
+            callers that only want counts leave it off.
+        """
+        if state is None:
+            state = HandState(hole_cards, community_cards)
+        deck = state.remaining()
+        cards_to_come = 5 - len(community_cards)
+        mask_counts = defaultdict(int)
+        out_counts = defaultdict(int)
+        two_card_counts = defaultdict(int)
+        # classification mask -> OR of the out cards / list of runner-runner pairs
+        out_cards = defaultdict(int)
+        two_card_pairs = defaultdict(list)
+
+        if cards_to_come == 0:
+            mask_counts[state.classify()[1]] += 1
+            return self._runout_result(1, mask_counts, out_counts, two_card_counts, out_cards,
+                                       two_card_pairs if collect_outs else None)
+
+        already_made = state.classify()[1]
+        turns = [state.plus(card) for card in deck]
+        next_street = [turn.classify()[1] for turn in turns]
+        for card, made in zip(deck, next_street):
+            out_counts[made & ~already_made] += 1
+            out_cards[made & ~already_made] |= 1 << card
+
+        if cards_to_come == 1:
+            for made in next_street:
+                mask_counts[made] += 1
+            total = len(deck)
         else:
-            two_card_outs = 0
-            two_card_total = 0
-            for card in deck:
-                all_cards = hole_cards + community_cards + [card]
-                if self._has_hand(all_cards, target_hand):
-                    outs += 1
-            for card in deck:
-                for card2 in deck:
-                    if card2 == card:
-                        continue
-                    two_card_total += 1
-                    all_cards = hole_cards + community_cards + [card]
-                    if self._has_hand(all_cards, target_hand):
-                        continue
-                    all_cards = hole_cards + community_cards + [card, card2]
-                    if self._has_hand(all_cards, target_hand):
-                        if verbose:
-                            input([card,card2])
-                        two_card_outs += 1
-                # if not self._has_hand(all_cards, target_hand):
-                #     for card2 in deck:
-                #         if card2 == card:
-                #             continue
-                #         all_cards = hole_cards + community_cards + [card, card2]
-                #         if self._has_hand(all_cards, target_hand):
-                #             if verbose:
-                #                 input([card, card2])
-
-                #             outs += 1
-
-        return {'outs': outs, 'two_card_outs': two_card_outs, 'two_card_total': two_card_total}
+            total = 0
+            for i in range(len(deck)):
+                first = turns[i]
+                for j in range(i + 1, len(deck)):
+                    total += 1
+                    made = first.plus(deck[j]).classify()[1]
+                    mask_counts[made] += 1
+                    runner_runner = made & ~(next_street[i] | next_street[j])
+                    two_card_counts[runner_runner] += 1
+                    if runner_runner and collect_outs:
+                        two_card_pairs[runner_runner].append((deck[i], deck[j]))
+        return self._runout_result(total, mask_counts, out_counts, two_card_counts, out_cards,
+                                   two_card_pairs if collect_outs else None)
+
+    @staticmethod
+    def _runout_result(total, mask_counts, out_counts, two_card_counts, out_cards, two_card_pairs):
+        result = {'total': total, 'counts': count_by_hand(mask_counts),
+                  'outs': count_by_hand(out_counts), 'two_card_outs': count_by_hand(two_card_counts),
+                  'out_masks': masks_by_hand(out_cards)}
+        if two_card_pairs is not None:
+            result['two_card_combos'] = pairs_by_hand(two_card_pairs)
+        return result
 
     def calculate_probability(self, hole_cards, community_cards):
-        """Calculate outs for all possible hand improvements
+        """Calculate outs and exact probabilities for all hand types
         Returns:
-            dict: Dictionary with keys as hand types and values as tuples (outs, probability)
+            dict: Dictionary with hand types as keys and dicts of
+            'outs', 'two_card_outs' and 'probability' (percent) as values
         """
-        hand_types = ["Pair", "Two Pair", "Three of a Kind", "Straight", 
-                      "Flush", "Full House", "Four of a Kind"]
-
+        runouts = self.enumerate_runouts(hole_cards, community_cards)
         outs_dict = {}
-        current_cards = hole_cards + community_cards
-        cards_needed = 1 if len(community_cards) == 4 else 2
-        remaining_cards = 52 - len(current_cards)
-        # print('remaining cards', remaining_cards)
-        for hand_type in hand_types:
-            if not self._has_hand(current_cards, hand_type, False):
-                num_outs_info = self._num_outs(hole_cards, community_cards, hand_type)
-                num_outs = num_outs_info['outs']
-                if 'two_card_outs' in num_outs_info:
-                    two_card_outs = num_outs_info['two_card_outs']
-                    two_card_total = num_outs_info['two_card_total']
-                # Calculate probability based on number of cards to come
-                if cards_needed == 1:
-                    # One card to come: outs / remaining cards
-                    probability = (num_outs / remaining_cards) * 100
-                else:
-                    fail_draws = binom(remaining_cards - num_outs, 2)
-                    all_draws = binom(remaining_cards, 2)
-                    probability_one = (1 - fail_draws / all_draws) * 100
-                    probility_two = (two_card_outs / two_card_total) * 100
-                    probability = (probability_one + probility_two)
-                
-                if 'two_card_outs' in num_outs_info:
-                    outs_dict[hand_type] = {'outs': num_outs,
-                      'two_card_outs': two_card_outs,'probability': round(probability, 2)}
-                else:
-                    outs_dict[hand_type] = (num_outs, round(probability, 2))
-           
-
+        for hand_type in HAND_TYPES:
+            probability = runouts['counts'][hand_type] / runouts['total'] * 100
+            outs_dict[hand_type] = {'outs': runouts['outs'][hand_type],
+                                    'two_card_outs': runouts['two_card_outs'][hand_type],
+                                    'probability': round(probability, 2)}
         return outs_dict
 
+    def calculate_all_holes(self, community_cards):
+        """
+        Exact probabilities for every hole card pair left on a flop (or turn),
+        computed in one board-centric sweep (see vectorized.sweep_holes).
+        Returns:
+            dict: (card1, card2) -> {hand type: probability (percent)}
+        """
+        from vectorized import sweep_holes
+        holes, counts, total = sweep_holes(community_cards)
+        return {
+            tuple(hole): {hand: round(count / total * 100, 2) for hand, count in zip(HAND_TYPES, row)}
+            for hole, row in zip(holes.tolist(), counts.tolist())
+        }
+
     def abbreviate_probability_dict(self, probability_dict):
         """
         Returns an abbreviated form of the probability dictionary,
@@ -315,8 +462,8 @@ def run_validation_tests():
 if __name__ == "__main__":
 
     validator = probabilityValidator()
-    hole_cards =  [["A", "♠"], ["7", "♥"]]
-    community_cards = [["K", "♦"], ["Q", "♣"], ["9", "♣"]]
+    hole_cards = cards_to_ints([["A", "♠"], ["7", "♥"]])
+    community_cards = cards_to_ints([["K", "♦"], ["Q", "♣"], ["9", "♣"]])
 
     abbreviated_probabilities = validator.get_abbreviated_probabilities(hole_cards, community_cards)
     print(abbreviated_probabilities)
@@ -324,9 +471,8 @@ if __name__ == "__main__":
 class HandEvaluator:
     """
     HandEvaluator identifies the best possible hand among a set
-    of poker hands. The method 'identify_best_hand' checks each
-    hand type in descending order of strength, returning as soon
-    as it finds a match.
+    of poker hands. The method 'identify_best_hand' classifies every
+    hand type in one call and returns the strongest one made.
     """
 
     def __init__(self):
@@ -336,36 +482,62 @@ class HandEvaluator:
     def identify_best_hand(self, hole_cards, community_cards):
         """
         Given hole_cards + community_cards, determine the single best ranked
-        poker hand in textual form. We'll check from strongest to weakest,
-        returning whichever we find first.
-
-        Fill in or update the logic to match your existing or desired approach.
+        poker hand in textual form.
         """
-        # Combine both sets of cards for analysis
-        all_cards = hole_cards + community_cards
-        validator = probabilityValidator()
-
-        # Check from best to worst. If we find it, we return immediately.
-        # Adjust the order or method names as suits your logic:
-        if validator._has_hand(all_cards, "Royal Flush",False):
-            return "Royal Flush"
-        elif validator._has_hand(all_cards, "Straight Flush",False):
-            return "Straight Flush"
-        elif validator._has_hand(all_cards, "Four of a Kind", False):
-            return "Four of a Kind"
-        elif validator._has_hand(all_cards, "Full House", False):
-            return "Full House"
-        elif validator._has_hand(all_cards, "Flush", False):
-            return "Flush"
-        elif validator._has_hand(all_cards, "Straight", False):
-            return "Straight"
-        elif validator._has_hand(all_cards, "Three of a Kind", False):
-            return "Three of a Kind"
-        elif validator._has_hand(all_cards, "Two Pair", False):
-            return "Two Pair"
-        elif validator._has_hand(all_cards, "Pair", False):
-            return "Pair"
-        else:
+        made = classify_cards(hole_cards + community_cards)[0]
+        if not made:
             return "High Card"
+        # Hand types are ordered weakest to strongest, so the top bit is the best hand
+        return HAND_TYPES[made.bit_length() - 1]
+
+    def hand_strength(self, hole_cards, community_cards):
+        """
+        Strength of the best five-card hand (see evaluator.py) and its category.
+        Unlike the category alone, strengths break ties by kicker.
+        """
+        from evaluator import evaluate, category_of
+        strength = evaluate(hole_cards + community_cards)
+        return strength, category_of(strength)
 
+    def classify_many(self, cards_array, strengths=False):
+        """
+        Best hand category of every row of an (N, 5..7) int card array,
+        without a Python loop per row (see vectorized.py and evaluator.py).
 
+        Codes index evaluator.CATEGORIES: 0 is High Card, then HAND_TYPES in
+        order, so CATEGORIES[code] is what identify_best_hand would return.
+        With 'strengths' the evaluator strengths are computed as well.
+        Returns:
+            ndarray: (N,) int8 category codes, or (codes, (N,) uint16 strengths)
+        """
+        import numpy as np
+        from evaluator import CATEGORY_FLOORS, evaluate_many
+        from vectorized import CHUNK_SIZE, classify_counts, rank_counts, suit_masks
+
+        cards_array = np.asarray(cards_array, dtype=np.int64)
+        if cards_array.ndim != 2 or not 5 <= cards_array.shape[1] <= 7:
+            raise ValueError(f"expected an (N, 5..7) card array, got shape {cards_array.shape}")
+        codes = np.empty(len(cards_array), dtype=np.int8)
+        values = np.empty(len(cards_array), dtype=np.uint16) if strengths else None
+        no_hole = np.zeros(4, dtype=np.int64)
+        # Hand types are ordered weakest to strongest, so a mask's top bit is its category
+        top_category = np.asarray([mask.bit_length() for mask in range(1 << len(HAND_TYPES))], dtype=np.int8)
+        # Chunked so millions of rows don't need millions-of-rows temporaries
+        for start in range(0, len(cards_array), CHUNK_SIZE):
+            chunk = cards_array[start:start + CHUNK_SIZE]
+            rows = slice(start, start + len(chunk))
+            if strengths:
+                # The strength already says the category, so skip the classifier
+                values[rows] = evaluate_many(chunk)
+                codes[rows] = np.searchsorted(CATEGORY_FLOORS, values[rows], side='right') - 1
+            else:
+                made = classify_counts(rank_counts(chunk), suit_masks(chunk), 0, no_hole)[0]
+                codes[rows] = top_category[made]
+        return (codes, values) if strengths else codes
+
+    def compare_hands(self, hole_cards_a, hole_cards_b, community_cards):
+        """Return 1 if hand A wins on this board, -1 if hand B wins, 0 for a split pot"""
+        from evaluator import evaluate
+        strength_a = evaluate(hole_cards_a + community_cards)
+        strength_b = evaluate(hole_cards_b + community_cards)
+        return (strength_a > strength_b) - (strength_a < strength_b)
@@ -0,0 +1,211 @@
+"""
+NumPy versions of the hand classifier and board sampler.
+
+Everything here works on int cards (see cards.py) held in arrays with one hand
+per row, and gives the same answers as validator.classify_cards row by row.
+Rank counts come from a single bincount, rank/suit masks from sums of rank
+bits, and the hand types from the same mask arithmetic as the scalar code.
+"""
+import numpy as np
+
+from validator import (STRAIGHT_COVER, ROYAL_MASK, PAIR, TWO_PAIR, THREE_OF_A_KIND,
+                       STRAIGHT, FLUSH, FULL_HOUSE, FOUR_OF_A_KIND, STRAIGHT_FLUSH,
+                       ROYAL_FLUSH)
+
+RANK_BITS = (1 << np.arange(13)).astype(np.int64)
+COVER_TABLE = np.asarray(STRAIGHT_COVER, dtype=np.int64)
+POPCOUNT_TABLE = np.asarray([mask.bit_count() for mask in range(1 << 13)], dtype=np.int8)
+
+# Rows per chunk when sampling, to keep temporary arrays to a few MB
+CHUNK_SIZE = 1 << 17
+
+
+def rank_counts(cards):
+    """(N, 16) count of each rank in every row of an (N, k) card array.
+
+    Columns 13-15 are always zero; the padding lets rank masks be bit-packed
+    two bytes per row.
+    """
+    cards = np.asarray(cards)
+    n = cards.shape[0]
+    flat = (cards >> 2) + 16 * np.arange(n)[:, None]
+    return np.bincount(flat.ravel(), minlength=16 * n).astype(np.uint8).reshape(n, 16)
+
+
+def suit_masks(cards):
+    """(N, 4) 13-bit rank mask of each suit in every row of an (N, k) card array"""
+    cards = np.asarray(cards)
+    n = cards.shape[0]
+    flat = (cards & 3) + 4 * np.arange(n)[:, None]
+    # Cards in a row are distinct, so summing rank bits within a suit is an OR
+    sums = np.bincount(flat.ravel(), weights=RANK_BITS[cards >> 2].ravel(), minlength=4 * n)
+    return sums.astype(np.int64).reshape(n, 4)
+
+
+def hole_masks(hole_cards):
+    """(hole rank mask, (4,) per-suit hole rank masks) for one list of int hole cards"""
+    hole_ranks = 0
+    hole_suits = np.zeros(4, dtype=np.int64)
+    for card in hole_cards:
+        hole_ranks |= 1 << (card >> 2)
+        hole_suits[card & 3] |= 1 << (card >> 2)
+    return hole_ranks, hole_suits
+
+
+def _rank_mask(present):
+    """(N,) 13-bit masks from an (N, 16) boolean array, one bit per rank"""
+    return np.packbits(present.ravel(), bitorder='little').view('<u2').astype(np.int64)
+
+
+def classify_counts(counts, suited, hole_ranks, hole_suits):
+    """Vectorized classify_cards from rank counts and suit masks.
+
+    Args:
+        counts: (N, 16) rank counts from rank_counts
+        suited: (N, 4) per-suit rank masks
+        hole_ranks: hole rank mask, scalar or (N,)
+        hole_suits: per-suit hole rank masks, (4,) or (N, 4)
+    Returns:
+        tuple: (made, made_with_hole) (N,) int arrays of HAND_TYPES bitmasks
+    """
+    rank_mask = _rank_mask(counts > 0)
+    paired = _rank_mask(counts >= 2)
+    trips = _rank_mask(counts >= 3)
+    quads = _rank_mask(counts >= 4)
+    hole_paired = (paired & hole_ranks) != 0
+    two_pair = POPCOUNT_TABLE[paired] >= 2
+    full_house = two_pair & (trips != 0)
+    cover = COVER_TABLE[rank_mask]
+
+    made = ((paired != 0) * PAIR | two_pair * TWO_PAIR | (trips != 0) * THREE_OF_A_KIND
+            | (cover != 0) * STRAIGHT | full_house * FULL_HOUSE | (quads != 0) * FOUR_OF_A_KIND)
+    with_hole = (hole_paired * PAIR | (two_pair & hole_paired) * TWO_PAIR
+                 | ((trips & hole_ranks) != 0) * THREE_OF_A_KIND
+                 | ((cover & hole_ranks) != 0) * STRAIGHT
+                 | (full_house & hole_paired) * FULL_HOUSE
+                 | ((quads & hole_ranks) != 0) * FOUR_OF_A_KIND)
+
+    # At most one suit can hold five cards, so only rows with a flush need the suit work
+    hole_suits = np.asarray(hole_suits)
+    for suit in range(4):
+        rows = np.flatnonzero(POPCOUNT_TABLE[suited[:, suit]] >= 5)
+        if not len(rows):
+            continue
+        in_suit = suited[rows, suit]
+        hole_suited = hole_suits[rows, suit] if hole_suits.ndim == 2 else hole_suits[suit]
+        suit_cover = COVER_TABLE[in_suit]
+        royal = (in_suit & ROYAL_MASK) == ROYAL_MASK
+        made[rows] |= FLUSH | (suit_cover != 0) * STRAIGHT_FLUSH | royal * ROYAL_FLUSH
+        with_hole[rows] |= ((hole_suited != 0) * FLUSH
+                            | ((suit_cover & hole_suited) != 0) * STRAIGHT_FLUSH
+                            | (royal & ((hole_suited & ROYAL_MASK) != 0)) * ROYAL_FLUSH)
+    return made, with_hole
+
+
+def classify_batch(cards, num_hole=2):
+    """Vectorized classify_cards over an (N, k) int card array.
+
+    The first 'num_hole' columns are the hole cards.
+    Returns:
+        tuple: (made, made_with_hole) (N,) int arrays of HAND_TYPES bitmasks
+    """
+    cards = np.asarray(cards, dtype=np.int64)
+    hole = cards[:, :num_hole]
+    hole_ranks = np.bitwise_or.reduce(RANK_BITS[hole >> 2], axis=1)
+    return classify_counts(rank_counts(cards), suit_masks(cards), hole_ranks, suit_masks(hole))
+
+
+def sample_boards(deck, num_cards, num_boards, rng):
+    """Deal 'num_cards' distinct cards from 'deck' for each of 'num_boards' rows.
+
+    Every row draws independently and rows that drew the same card twice are
+    redrawn; with at most five cards from 45+ that only repeats a few times.
+    Returns:
+        (num_boards, num_cards) int array of cards
+    """
+    deck = np.asarray(deck, dtype=np.int64)
+    picks = rng.integers(0, len(deck), size=(num_boards, num_cards))
+    redraw = np.arange(num_boards)
+    while num_cards > 1:
+        ordered = np.sort(picks[redraw], axis=1)
+        redraw = redraw[(ordered[:, 1:] == ordered[:, :-1]).any(axis=1)]
+        if not len(redraw):
+            break
+        picks[redraw] = rng.integers(0, len(deck), size=(len(redraw), num_cards))
+    return deck[picks]
+
+
+def simulate_counts(known_cards, num_simulations, rng, require_hole_cards=True):
+    """Monte Carlo counts of each classification mask over random runouts.
+
+    'known_cards' are the hole cards followed by any community cards; their
+    rank counts and suit masks are computed once and every sampled board is
+    added on top.
+    Returns:
+        dict: {classification mask: number of sampled boards}
+    """
+    from cards import remaining_cards
+
+    deck = remaining_cards(known_cards)
+    cards_dealt = 7 - len(known_cards)
+    known = np.asarray([known_cards], dtype=np.int64)
+    known_counts = rank_counts(known)
+    known_suits = suit_masks(known)
+    hole_ranks, hole_suits = hole_masks(known_cards[:2])
+    mask_counts = {}
+    done = 0
+    while done < num_simulations:
+        chunk = min(CHUNK_SIZE, num_simulations - done)
+        board = sample_boards(deck, cards_dealt, chunk, rng)
+        counts = rank_counts(board) + known_counts
+        suited = suit_masks(board) | known_suits
+        made, with_hole = classify_counts(counts, suited, hole_ranks, hole_suits)
+        values, freqs = np.unique(with_hole if require_hole_cards else made, return_counts=True)
+        for value, freq in zip(values.tolist(), freqs.tolist()):
+            mask_counts[value] = mask_counts.get(value, 0) + freq
+        done += chunk
+    return mask_counts
+
+
+def sweep_holes(community_cards, require_hole_cards=True):
+    """Exact hand-type counts for every hole card pair on one flop (or turn).
+
+    Each completion of the board is enumerated once and its rank counts and
+    suit masks are computed once; every hole pair that doesn't collide with
+    it is then classified by adding only the two hole cards on top.
+    Returns:
+        tuple: ((M, 2) hole cards, (M, 9) counts per HAND_TYPES column,
+        runouts per hole pair)
+    """
+    from itertools import combinations
+    from math import comb
+    from cards import remaining_cards
+
+    deck = remaining_cards(community_cards)
+    cards_to_come = 5 - len(community_cards)
+    runouts = np.asarray(list(combinations(deck, cards_to_come)), dtype=np.int64).reshape(-1, cards_to_come)
+    holes = np.asarray(list(combinations(deck, 2)), dtype=np.int64)
+    boards = np.concatenate([np.broadcast_to(np.asarray(community_cards, dtype=np.int64),
+                                             (len(runouts), len(community_cards))), runouts], axis=1)
+
+    board_counts = rank_counts(boards)
+    board_suits = suit_masks(boards)
+    hole_counts = rank_counts(holes)
+    hole_suits = suit_masks(holes)
+    hole_ranks = _rank_mask(hole_counts > 0)
+    # A hole pair can't use a runout that already holds one of its cards
+    collides = (holes[:, None, :, None] == runouts[None, :, None, :]).any(axis=(2, 3))
+
+    bit_idx = np.arange(9)
+    counts = np.zeros((len(holes), 9), dtype=np.int64)
+    per_chunk = max(1, CHUNK_SIZE // len(runouts))
+    for start in range(0, len(holes), per_chunk):
+        hole_idx = np.arange(start, min(start + per_chunk, len(holes)))
+        h = np.repeat(hole_idx, len(runouts))
+        b = np.tile(np.arange(len(runouts)), len(hole_idx))
+        made, with_hole = classify_counts(board_counts[b] + hole_counts[h], board_suits[b] | hole_suits[h],
+                                          hole_ranks[h], hole_suits[h])
+        masks = (with_hole if require_hole_cards else made).reshape(len(hole_idx), len(runouts))
+        masks = np.where(collides[hole_idx], 0, masks)
+        counts[hole_idx] = ((masks[:, :, None] >> bit_idx) & 1).sum(axis=1)
+    return holes, counts, comb(len(deck) - 2, cards_to_come)
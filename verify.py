@@ -0,0 +1,213 @@
+"""
+Exhaustive check of the hand classifiers over all 133,784,560 seven-card hands.
+
+Every hand is put through each chosen implementation and reduced to its best
+category (index into evaluator.CATEGORIES). Per implementation the category
+totals are checked against the known counts, and the implementations are
+diffed hand by hand; the first few disagreements are kept as examples.
+
+Hands are split into 1,081 tasks by their two lowest cards and spread over a
+process pool. Finished tasks are recorded in a checkpoint file, so an
+interrupted run picks up where it stopped:
+
+    python verify.py                              # vectorized vs evaluator, all cores
+    python verify.py --impl classify_cards --impl evaluator --limit 20
+    python verify.py --checkpoint my_run.json --workers 8
+
+The scalar implementations (classify_cards, has_hand, evaluate) check every
+hand one Python call at a time, so they are only practical with --limit.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import chain, combinations
+from math import comb
+
+import numpy as np
+
+from evaluator import CATEGORIES, CATEGORY_FLOORS
+
+CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'verify_checkpoint.json')
+
+# Seven-card hands per best category, in CATEGORIES order
+KNOWN_TOTALS = [23294460, 58627800, 31433400, 6461620, 6180020, 4047644,
+                3473184, 224848, 37260, 4324]
+TOTAL_HANDS = comb(52, 7)
+
+CHUNK_ROWS = 1 << 17
+MAX_EXAMPLES = 20
+
+# Highest set bit + 1 of every HAND_TYPES mask: 0 is High Card, 1 Pair, ...
+_TOP_CATEGORY = np.asarray([mask.bit_length() for mask in range(1 << 9)], dtype=np.int8)
+
+
+def _vectorized(cards):
+    from vectorized import classify_batch
+    return _TOP_CATEGORY[classify_batch(cards)[0]]
+
+
+def _evaluator(cards):
+    from evaluator import evaluate_many
+    return (np.searchsorted(CATEGORY_FLOORS, evaluate_many(cards), side='right') - 1).astype(np.int8)
+
+
+def _classify_cards(cards):
+    from validator import classify_cards
+    return np.asarray([classify_cards(row)[0].bit_length() for row in cards.tolist()], dtype=np.int8)
+
+
+def _has_hand(cards):
+    from validator import probabilityValidator, HAND_TYPES
+    validator = probabilityValidator()
+    codes = []
+    for row in cards.tolist():
+        code = 0
+        for idx in range(len(HAND_TYPES), 0, -1):
+            if validator._has_hand(row, HAND_TYPES[idx - 1], require_hole_cards=False):
+                code = idx
+                break
+        codes.append(code)
+    return np.asarray(codes, dtype=np.int8)
+
+
+def _evaluate(cards):
+    from evaluator import evaluate, category_of
+    return np.asarray([CATEGORIES.index(category_of(evaluate(row))) for row in cards.tolist()], dtype=np.int8)
+
+
+# name -> function from an (N, 7) int card array to (N,) category indices
+IMPLEMENTATIONS = {
+    'vectorized': _vectorized,
+    'evaluator': _evaluator,
+    'classify_cards': _classify_cards,
+    'has_hand': _has_hand,
+    'evaluate': _evaluate,
+}
+
+
+def tasks():
+    """(lowest card, second lowest card) pairs, grouped by the second card"""
+    return [(low, second) for second in range(1, 47) for low in range(second)]
+
+
+_rest_cache = {}
+
+
+def _rest(second):
+    """All five-card sets above 'second', shared by the tasks with that second card"""
+    if second not in _rest_cache:
+        _rest_cache.clear()
+        above = range(second + 1, 52)
+        _rest_cache[second] = np.fromiter(chain.from_iterable(combinations(above, 5)), dtype=np.int8,
+                                          count=5 * comb(len(above), 5)).reshape(-1, 5)
+    return _rest_cache[second]
+
+
+def run_task(task, impls):
+    """Category counts per implementation and disagreements for one task; runs in a worker"""
+    low, second = task
+    rest = _rest(second)
+    counts = {name: [0] * len(CATEGORIES) for name in impls}
+    mismatches = 0
+    examples = []
+    for start in range(0, len(rest), CHUNK_ROWS):
+        part = rest[start:start + CHUNK_ROWS].astype(np.int64)
+        cards = np.concatenate([np.broadcast_to(np.asarray([low, second]), (len(part), 2)), part], axis=1)
+        codes = {name: IMPLEMENTATIONS[name](cards) for name in impls}
+        for name, code in codes.items():
+            for idx, count in enumerate(np.bincount(code, minlength=len(CATEGORIES)).tolist()):
+                counts[name][idx] += count
+        reference = codes[impls[0]]
+        differ = np.zeros(len(cards), dtype=bool)
+        for name in impls[1:]:
+            differ |= codes[name] != reference
+        rows = np.flatnonzero(differ)
+        mismatches += len(rows)
+        for row in rows[:MAX_EXAMPLES - len(examples)].tolist():
+            examples.append({'cards': cards[row].tolist(),
+                             **{name: CATEGORIES[codes[name][row]] for name in impls}})
+    return task, counts, mismatches, examples
+
+
+def load_checkpoint(path, impls):
+    """Saved progress for this set of implementations, or a fresh state"""
+    if os.path.exists(path):
+        with open(path) as f:
+            state = json.load(f)
+        if state.get('impls') == impls:
+            return state
+        print(f"{path} is for {state.get('impls')}, starting over")
+    return {'impls': impls, 'done': [], 'counts': {name: [0] * len(CATEGORIES) for name in impls},
+            'hands': 0, 'mismatches': 0, 'examples': [], 'seconds': 0.0}
+
+
+def save_checkpoint(path, state):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def verify(impls, workers=None, checkpoint=CHECKPOINT_PATH, limit=None):
+    """Run (or resume) the check; returns the final state dict"""
+    state = load_checkpoint(checkpoint, impls)
+    done = set(map(tuple, state['done']))
+    todo = [task for task in tasks() if task not in done][:limit]
+    print(f"{len(done)} tasks done, {len(todo)} to run with {', '.join(impls)}")
+
+    started = time.monotonic() - state['seconds']
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_task, task, impls) for task in todo]
+        for future in as_completed(futures):
+            task, counts, mismatches, examples = future.result()
+            for name in impls:
+                state['counts'][name] = [a + b for a, b in zip(state['counts'][name], counts[name])]
+            state['hands'] += sum(counts[impls[0]])
+            state['mismatches'] += mismatches
+            state['examples'] = (state['examples'] + examples)[:MAX_EXAMPLES]
+            state['done'].append(list(task))
+            state['seconds'] = time.monotonic() - started
+            save_checkpoint(checkpoint, state)
+            print(f"[{len(state['done'])}/{len(tasks())}] {state['hands']:,} hands, "
+                  f"{state['mismatches']} mismatches, {state['seconds']:.0f}s")
+    return state
+
+
+def report(state):
+    """Print totals against the known counts; returns True if everything checks out"""
+    complete = state['hands'] == TOTAL_HANDS
+    ok = state['mismatches'] == 0
+    print(f"\n{state['hands']:,} of {TOTAL_HANDS:,} hands checked in {state['seconds']:.0f}s")
+    header = ''.join(f"{name:>16}" for name in state['impls'])
+    print(f"{'category':<16}{'known':>16}{header}")
+    for idx, category in enumerate(CATEGORIES):
+        row = ''.join(f"{state['counts'][name][idx]:>16,}" for name in state['impls'])
+        print(f"{category:<16}{KNOWN_TOTALS[idx]:>16,}{row}")
+    if complete:
+        for name in state['impls']:
+            if state['counts'][name] != KNOWN_TOTALS:
+                print(f"{name}: category totals do not match the known counts")
+                ok = False
+    else:
+        print("partial run: totals not compared with the known counts")
+    if state['mismatches']:
+        print(f"{state['mismatches']:,} hands where the implementations disagree, e.g.:")
+        for example in state['examples']:
+            print(f"  {example}")
+    print("OK" if ok else "FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check hand classifiers over every seven-card hand")
+    parser.add_argument('--impl', action='append', choices=sorted(IMPLEMENTATIONS),
+                        help="implementation to check (repeat to diff several; default vectorized and evaluator)")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH)
+    parser.add_argument('--limit', type=int, default=None, help="only run this many more tasks")
+    args = parser.parse_args()
+    state = verify(args.impl or ['vectorized', 'evaluator'], args.workers, args.checkpoint, args.limit)
+    sys.exit(0 if report(state) else 1)